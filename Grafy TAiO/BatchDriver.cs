@@ -0,0 +1,90 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Linq;
+using System.Text;
+using System.Text.Json;
+using System.Threading.Tasks;
+
+namespace Grafy_TAiO
+{
+    // Runs many solver jobs in one process so that each measurement covers the solve
+    // itself rather than a runtime cold start. Jobs are read from standard input as
+    // "mode<TAB>src<TAB>dst[<TAB>timeout]" lines, the optional timeout (seconds)
+    // overriding the default; one JSON result line per job, with the solver's
+    // per-phase times, is written to standard output as soon as the job finishes.
+    internal static class BatchDriver
+    {
+        public const int TimeoutExitCode = 3;
+
+        public static int Run(int timeoutSeconds)
+        {
+            List<(bool approximate, string source, string destination, int timeout)> jobs = new();
+
+            string? line;
+            while ((line = Console.ReadLine()) != null)
+            {
+                if (string.IsNullOrWhiteSpace(line))
+                    continue;
+
+                string[] parts = line.Split('\t');
+                if (parts.Length != 3 && parts.Length != 4)
+                    throw new ArgumentException($"Invalid job line: '{line}'");
+
+                int jobTimeout = parts.Length == 4 ? int.Parse(parts[3]) : timeoutSeconds;
+                jobs.Add((parts[0] == "approx", parts[1], parts[2], jobTimeout));
+            }
+
+            for (int index = 0; index < jobs.Count; index++)
+            {
+                (bool approximate, string source, string destination, int timeout) = jobs[index];
+
+                string status = "ok";
+                string? error = null;
+                Dictionary<string, long>? phases = null;
+                long? outputBytes = null;
+
+                long start = Stopwatch.GetTimestamp();
+                Task<PhaseTimer> task = Task.Run(() => Program.Run(approximate, source, destination));
+                bool finished;
+                try
+                {
+                    finished = task.Wait(TimeSpan.FromSeconds(timeout));
+                }
+                catch (AggregateException e)
+                {
+                    finished = true;
+                    status = "error";
+                    error = e.InnerException?.Message ?? e.Message;
+                }
+                TimeSpan elapsed = Stopwatch.GetElapsedTime(start);
+
+                if (!finished)
+                    status = "timeout";
+                else if (status == "ok")
+                {
+                    phases = task.Result.Nanoseconds();
+                    outputBytes = task.Result.OutputBytes;
+                }
+
+                Console.WriteLine(JsonSerializer.Serialize(new
+                {
+                    index,
+                    status,
+                    elapsed_ns = elapsed.Ticks * 100,
+                    phases_ns = phases,
+                    output_bytes = outputBytes,
+                    error,
+                }));
+                Console.Out.Flush();
+
+                // A running solve cannot be aborted, so give up on the remaining jobs;
+                // the caller resubmits them to a fresh process.
+                if (!finished)
+                    return TimeoutExitCode;
+            }
+
+            return 0;
+        }
+    }
+}
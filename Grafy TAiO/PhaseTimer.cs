@@ -0,0 +1,55 @@
+﻿using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Linq;
+
+namespace Grafy_TAiO
+{
+    // Wall time of each phase of a solver run (read, solve, format, write), measured
+    // with the high-resolution Stopwatch clock. Exactly one phase runs at a time:
+    // switching charges the time since the previous switch to the phase that was
+    // running, so formatting calls nested in writing a report are not counted twice.
+    // Also carries the size of the written report, when there is one.
+    internal class PhaseTimer
+    {
+        public static readonly string[] Phases = { "read", "solve", "format", "write" };
+
+        public long? OutputBytes { get; set; }
+
+        readonly Dictionary<string, long> ticks = new();
+        string? phase;
+        long since;
+
+        public void Switch(string? next)
+        {
+            long now = Stopwatch.GetTimestamp();
+            if (phase != null)
+                ticks[phase] = ticks.GetValueOrDefault(phase) + now - since;
+            phase = next;
+            since = now;
+        }
+
+        // Runs format as the "format" phase, then resumes the phase that was running
+        public string Format(Func<string> format)
+        {
+            string? resume = phase;
+            Switch("format");
+            string text = format();
+            Switch(resume);
+            return text;
+        }
+
+        public Dictionary<string, long> Nanoseconds() =>
+            Phases.ToDictionary(p => p, p => (long)(ticks.GetValueOrDefault(p) * (1e9 / Stopwatch.Frequency)));
+
+        // One "TIMING <phase> <nanoseconds>" line per phase on standard error, then
+        // "OUTPUT <bytes>" if a report file was written
+        public void Report()
+        {
+            foreach ((string p, long ns) in Nanoseconds())
+                Console.Error.WriteLine($"TIMING {p} {ns}");
+            if (OutputBytes != null)
+                Console.Error.WriteLine($"OUTPUT {OutputBytes}");
+        }
+    }
+}
@@ -5,6 +5,12 @@
         static void Main(string[] args)
         {
 #if RELEASE
+            if (args.Length >= 1 && args[0] == "--batch")
+            {
+                int timeoutSeconds = args.Length > 1 ? int.Parse(args[1]) : 300;
+                Environment.Exit(BatchDriver.Run(timeoutSeconds));
+            }
+
             if (args.Length < 1 || args.Length > 3)
             {
                 Usage();
@@ -67,9 +73,11 @@
 
             Graph G, H;
             int k;
+            PhaseTimer timer = new();
 
             try
             {
+                timer.Switch("read");
                 (G, H, k) = ReadFile(source);
             }
             catch (Exception e)
@@ -88,35 +96,13 @@
 
             ISolver solver = approximate ? new ApproximateSolver() : new ExactSolver();
 
+            timer.Switch("solve");
             (Graph result, int edits, int[][] verticeSelections) = solver.Solve(G, H, k);
 
+            timer.Switch("write");
             if (destination != null)
             {
-                using (StreamWriter sw = new StreamWriter(destination))
-                {
-                    sw.WriteLine("Graphs are displayed as adjacency matrixes preceded by a number of vertices.");
-                    sw.WriteLine("'m[i][j] = x' means there are 'x' edges between vertex 'i' and vertex 'j'");
-                    sw.WriteLine();
-                    sw.WriteLine("Given the graph G:");
-                    sw.WriteLine(G.ToString());
-                    sw.WriteLine("Given the graph H to find in the extended G:");
-                    sw.WriteLine(H.ToString());
-                    sw.WriteLine();
-                    sw.WriteLine($"And given the number of copies to find k is {k}");
-                    sw.WriteLine();
-                    sw.WriteLine($"Solution (the extended G) found with {edits} editions:");
-                    sw.Write(result.ToString());
-                    sw.WriteLine();
-                    sw.WriteLine("The difference between the base graph G and the solution is:");
-                    sw.Write(result.GetAdditions(G));
-                    sw.WriteLine();
-                    sw.WriteLine("Copies of H found in the extended G are as follows:");
-                    for (int i = 0; i < k; i++)
-                    {
-                        sw.WriteLine();
-                        sw.Write(result.ShowSubgraph(H, verticeSelections[i]));
-                    }
-                }
+                WriteReport(destination, G, H, k, result, edits, verticeSelections, timer);
             }
             else
             {
@@ -125,20 +111,20 @@
                 Console.WriteLine();
                 
                 Console.WriteLine("Given the graph G:");
-                Console.WriteLine(G.ToString());
+                Console.WriteLine(timer.Format(() => G.ToString()));
 
                 Console.WriteLine("Given the graph H to find in the extended G:");
-                Console.WriteLine(H.ToString());
+                Console.WriteLine(timer.Format(() => H.ToString()));
 
                 Console.WriteLine($"And given the number of copies to find k is {k}");
                 Console.WriteLine();
 
                 Console.WriteLine($"Solution (the extended G) found with {edits} editions:");
-                Console.Write(result.ToString());
+                Console.Write(timer.Format(() => result.ToString()));
                 Console.WriteLine();
 
                 Console.WriteLine("The difference between the base graph G and the solution is:");
-                Console.Write(result.GetAdditions(G));
+                Console.Write(timer.Format(() => result.GetAdditions(G)));
                 Console.WriteLine();
 
                 Console.WriteLine("Copies of H found in the extended G are as follows:");
@@ -146,19 +132,82 @@
                 {
                     Console.WriteLine();
                     Console.WriteLine($"Nr {i + 1}:");
-                    Console.Write(result.ShowSubgraph(H, verticeSelections[i]));
+                    Console.Write(timer.Format(() => result.ShowSubgraph(H, verticeSelections[i])));
+                }
+                Console.Out.Flush();
+            }
+            timer.Switch(null);
+            timer.Report();
+        }
+
+        internal static PhaseTimer Run(bool approximate, string source, string destination)
+        {
+            PhaseTimer timer = new();
+            timer.Switch("read");
+            (Graph G, Graph H, int k) = ReadFile(source);
+
+            if (H.GetNumberOfVertices() == 0)
+                throw new ArgumentException("Graph H is empty!");
+
+            ISolver solver = approximate ? new ApproximateSolver() : new ExactSolver();
+
+            timer.Switch("solve");
+            (Graph result, int edits, int[][] verticeSelections) = solver.Solve(G, H, k);
+
+            timer.Switch("write");
+            WriteReport(destination, G, H, k, result, edits, verticeSelections, timer);
+            timer.Switch(null);
+            return timer;
+        }
+
+        // Building each section's text is timed as the "format" phase, the rest as
+        // whatever phase the timer is running (writing). The destination may be a
+        // device or pipe such as /dev/null or /dev/stdout; the bytes written are
+        // counted either way.
+        static void WriteReport(string destination, Graph G, Graph H, int k, Graph result, int edits, int[][] verticeSelections, PhaseTimer timer)
+        {
+            CountingStream output = new(new FileStream(destination, FileMode.Create, FileAccess.Write));
+            using (StreamWriter sw = new StreamWriter(output))
+            {
+                sw.WriteLine("Graphs are displayed as adjacency matrixes preceded by a number of vertices.");
+                sw.WriteLine("'m[i][j] = x' means there are 'x' edges between vertex 'i' and vertex 'j'");
+                sw.WriteLine();
+                sw.WriteLine("Given the graph G:");
+                sw.WriteLine(timer.Format(() => G.ToString()));
+                sw.WriteLine("Given the graph H to find in the extended G:");
+                sw.WriteLine(timer.Format(() => H.ToString()));
+                sw.WriteLine();
+                sw.WriteLine($"And given the number of copies to find k is {k}");
+                sw.WriteLine();
+                sw.WriteLine($"Solution (the extended G) found with {edits} editions:");
+                sw.Write(timer.Format(() => result.ToString()));
+                sw.WriteLine();
+                sw.WriteLine("The difference between the base graph G and the solution is:");
+                sw.Write(timer.Format(() => result.GetAdditions(G)));
+                sw.WriteLine();
+                sw.WriteLine("Copies of H found in the extended G are as follows:");
+                for (int i = 0; i < k; i++)
+                {
+                    sw.WriteLine();
+                    sw.Write(timer.Format(() => result.ShowSubgraph(H, verticeSelections[i])));
                 }
             }
+            timer.OutputBytes = output.BytesWritten;
         }
 
         static void Usage()
         {
             Console.WriteLine("Usage:\n" +
                 "program [-a] src [dst]\n" +
+                "program --batch [timeout]\n" +
                 "\n" +
                 "-a - calculate approximation\n" +
                 "src - source file path containing both graph descriptions and optional number k\n" +
-                "dst - optional destination file path to write minimal extension and number of additions\n");
+                "dst - optional destination file path to write minimal extension and number of additions\n" +
+                "--batch - read 'mode<TAB>src<TAB>dst' jobs from standard input and print one JSON result line per job\n" +
+                "\n" +
+                "After solving, one 'TIMING <phase> <nanoseconds>' line per phase (read, solve, format, write) and, with dst,\n" +
+                "an 'OUTPUT <bytes>' line with the size of the report are printed to standard error\n");
         }
 
 
@@ -0,0 +1,105 @@
+"""Reference approximate solver: degree-ordered placements of H, mirroring ApproximateSolver."""
+
+import sys
+from itertools import combinations, islice
+
+import numpy as np
+
+from exact_solver import missing_vertices
+from generate_graphs import read_test_input
+
+
+def sorted_indices(M):
+    """
+    Vertices by decreasing out-degree, ties kept in index order like the
+    stable OrderByDescending of GetSortedIndices.
+    """
+    return np.argsort(-M.sum(axis=1), kind="stable")
+
+
+def solve(G, H, k):
+    """
+    Solve like ApproximateSolver.Solve: returns (extended G, edits,
+    selections), selections[i][u] being the vertex of the extended G that H's
+    vertex u is mapped to in the i-th copy.
+
+    The i-th copy maps H's vertices, by decreasing degree, onto the i-th
+    n2-subset (in GetCombinations' lexicographic order) of the extended G's
+    vertices by decreasing degree, adding the edges H needs there. Subsets
+    that share their first positions with the previous one share the cells
+    between those positions too, which already hold H's edges, so only the
+    rows and columns of the positions that changed are compared.
+    """
+    n1, n2 = len(G), len(H)
+    m = missing_vertices(n1, n2, k)
+    N = n1 + m
+
+    R = np.zeros((N, N), dtype=np.int64)
+    R[:n1, :n1] = G
+    tG, tH = sorted_indices(R), sorted_indices(H)
+    H_sorted = H[np.ix_(tH, tH)]
+
+    edits = m
+    selections = np.empty((k, n2), dtype=np.int64)
+    previous = None
+    for i, P in enumerate(islice(combinations(range(N), n2), k)):
+        P = np.array(P)
+        vertices = tG[P]
+        # First position whose vertex differs from the previous copy's
+        j = 0 if previous is None else int(np.argmax(P != previous))
+        for rows, cols in ((slice(j, None), slice(None)), (slice(j), slice(j, None))):
+            cells = np.ix_(vertices[rows], vertices[cols])
+            deficit = H_sorted[rows, cols] - R[cells]
+            np.maximum(deficit, 0, out=deficit)
+            R[cells] += deficit
+            edits += int(deficit.sum())
+        selections[i, tH] = vertices
+        previous = P
+
+    return R, edits, selections
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Reference approximate solver")
+    parser.add_argument("input", help="Test input file")
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="Solver report to cross-check the edit count and selections against",
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Do not print the selections"
+    )
+    args = parser.parse_args()
+
+    G, H, k = read_test_input(args.input)
+    start = time.perf_counter()
+    extended, edits, selections = solve(G, H, k)
+    elapsed = time.perf_counter() - start
+
+    print(f"Solution found with {edits} editions in {elapsed:.3f}s")
+    if not args.quiet:
+        for i, selection in enumerate(selections, 1):
+            print(f"Nr {i}: G: {' '.join(map(str, selection))}")
+
+    if args.compare:
+        from verify_outputs import read_output
+
+        reported, reported_extended, _, reported_selections = read_output(args.compare)
+        problems = []
+        if reported != edits:
+            problems.append(f"reports {reported} editions")
+        if not np.array_equal(reported_selections, selections.ravel()):
+            problems.append("reports different selections")
+        if reported_extended is not None and not np.array_equal(
+            reported_extended, extended
+        ):
+            problems.append("reports a different extended graph")
+        if problems:
+            print(f"MISMATCH: {args.compare} {', '.join(problems)}")
+            sys.exit(1)
+        print(f"{args.compare} agrees")
@@ -0,0 +1,251 @@
+"""Regression gate: compare a run's timings against a named baseline run."""
+
+import math
+import sys
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from results_store import DEFAULT_DB, connect, name_run, resolve_run, setup
+
+# ANSI color codes
+RED = "\033[91m"
+GREEN = "\033[92m"
+RESET = "\033[0m"
+
+KEY = ("mode", "graph_type", "n1", "n2", "k")
+# Largest samples whose exact Mann-Whitney distribution is enumerated
+EXACT_LIMIT = 8
+
+
+def load_timings(conn, run_id):
+    """{(mode, graph_type, n1, n2, k): [elapsed]} of a run's successful tests."""
+    timings = defaultdict(list)
+    rows = conn.execute(
+        f"SELECT {', '.join(KEY)}, elapsed FROM results "
+        "WHERE run_id = ? AND status = 'ok' AND elapsed IS NOT NULL",
+        (run_id,),
+    )
+    for *key, elapsed in rows:
+        timings[tuple(key)].append(elapsed)
+    return timings
+
+
+def average_ranks(values):
+    """Ranks starting at 1, tied values sharing their average rank."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return ((ends - counts + 1 + ends) / 2)[inverse], counts
+
+
+def mann_whitney(a, b):
+    """
+    Two-sided Mann-Whitney U test of a against b. Returns (U of a, p-value).
+    Small samples without ties use the exact distribution of U, others the
+    normal approximation with tie and continuity corrections.
+    """
+    n1, n2 = len(a), len(b)
+    ranks, ties = average_ranks(np.concatenate([a, b]))
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+
+    if max(n1, n2) <= EXACT_LIMIT and (ties == 1).all():
+        # Every split of the pooled ranks is equally likely under the null
+        n = n1 + n2
+        us = np.array(
+            [
+                sum(split) - n1 * (n1 + 1) / 2
+                for split in combinations(range(1, n + 1), n1)
+            ]
+        )
+        extreme = (np.abs(us - mean) >= abs(u - mean) - 1e-9).mean()
+        return u, float(extreme)
+
+    n = n1 + n2
+    tie_term = ((ties**3 - ties).sum()) / (n * (n - 1))
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance <= 0:
+        return u, 1.0
+    z = max(abs(u - mean) - 0.5, 0) / math.sqrt(variance)
+    return u, math.erfc(z / math.sqrt(2))
+
+
+def min_p_value(n1, n2):
+    """
+    Smallest two-sided p-value mann_whitney can give for these sample sizes,
+    reached when the samples do not overlap at all. Ties within a sample
+    shrink the normal approximation's variance, so its floor has each sample
+    tied throughout; small samples without ties take the exact distribution,
+    so both are considered for them.
+    """
+    n = n1 + n2
+    tie_term = (n1**3 - n1 + n2**3 - n2) / (n * (n - 1))
+    z = (n1 * n2 / 2 - 0.5) / math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    p = math.erfc(z / math.sqrt(2))
+    if max(n1, n2) <= EXACT_LIMIT:
+        p = min(p, 2 / math.comb(n, n1))
+    return p
+
+
+def min_adjusted_p(rows):
+    """
+    Smallest Holm-adjusted p-value any size of a comparison can reach: the
+    correction multiplies the smallest p-value by the number of sizes. If it
+    is not below alpha, no size can be flagged however large the change.
+    """
+    if not rows:
+        return 1.0
+    floor = min(min_p_value(len(row["base"]), len(row["current"])) for row in rows)
+    return min(1.0, len(rows) * floor)
+
+
+def holm(p_values):
+    """Holm-Bonferroni adjusted p-values, in the input order."""
+    order = np.argsort(p_values)
+    adjusted = np.empty(len(p_values))
+    running = 0.0
+    for rank, i in enumerate(order):
+        running = max(running, (len(p_values) - rank) * p_values[i])
+        adjusted[i] = min(running, 1.0)
+    return adjusted
+
+
+def compare(baseline, current, min_effect=0.05, alpha=0.05):
+    """
+    Match the two runs' timings per (mode, type, n1, n2, k). A size is a
+    regression (or improvement) when its median changed by more than
+    min_effect and the Holm-adjusted Mann-Whitney p-value is below alpha.
+    A size whose baseline median is 0 (below the timer's resolution) has no
+    relative change (None) and is decided on the p-value alone. Returns the
+    matched rows, largest slowdowns first.
+    """
+    rows = []
+    for key in sorted(baseline.keys() & current.keys()):
+        base, cur = np.array(baseline[key]), np.array(current[key])
+        _, p = mann_whitney(cur, base)
+        base_median, cur_median = np.median(base), np.median(cur)
+        if base_median > 0:
+            change = cur_median / base_median - 1
+        else:
+            change = None if cur_median > 0 else 0.0
+        rows.append(
+            {
+                "key": key,
+                "base": base,
+                "current": cur,
+                "change": change,
+                "p": p,
+            }
+        )
+
+    if rows:
+        for row, adjusted in zip(rows, holm([row["p"] for row in rows])):
+            row["p_adjusted"] = adjusted
+            change = row["change"]
+            significant = adjusted < alpha and (
+                change is None or abs(change) > min_effect
+            )
+            row["verdict"] = (
+                ("regression" if change is None or change > 0 else "improvement")
+                if significant
+                else "-"
+            )
+    rows.sort(key=lambda row: -math.inf if row["change"] is None else -row["change"])
+    return rows
+
+
+def print_comparison(rows, show_all=False):
+    print(
+        f"{'Mode':<7} {'Type':<10} {'n1':<7} {'n2':<7} {'k':<5} {'Runs':<8} "
+        f"{'Base (s)':<10} {'Now (s)':<10} {'Change':<9} {'p (Holm)':<9} Verdict"
+    )
+    print("-" * 96)
+    for row in rows:
+        if not show_all and row["verdict"] == "-":
+            continue
+        mode, graph_type, n1, n2, k = row["key"]
+        color = {"regression": RED, "improvement": GREEN}.get(row["verdict"], "")
+        runs = f"{len(row['base'])}/{len(row['current'])}"
+        change = "n/a" if row["change"] is None else f"{row['change']:+.1%}"
+        print(
+            f"{color}{mode:<7} {str(graph_type):<10} {n1:<7} {n2:<7} {k:<5} "
+            f"{runs:<8} {np.median(row['base']):<10.4f} "
+            f"{np.median(row['current']):<10.4f} {change:<9} "
+            f"{row['p_adjusted']:<9.3g} {row['verdict']}{RESET if color else ''}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare a run against a baseline run from the results store"
+    )
+    parser.add_argument("baseline", help="Baseline run name or id")
+    parser.add_argument(
+        "run",
+        nargs="?",
+        default="latest",
+        help="Run to check: name, id or 'latest' (default)",
+    )
+    parser.add_argument("--db", type=str, default=DEFAULT_DB, help="Results store")
+    parser.add_argument(
+        "--min-effect",
+        type=float,
+        default=0.05,
+        help="Smallest relative change of the median that counts (default 5%%)",
+    )
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level")
+    parser.add_argument(
+        "--all", action="store_true", help="Also list sizes without a verdict"
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Instead of comparing, name the run as the baseline",
+    )
+    args = parser.parse_args()
+
+    setup(args.db)
+    conn = connect(args.db)
+    try:
+        run_id = resolve_run(conn, args.run)
+        if args.save:
+            name_run(conn, args.baseline, run_id)
+            print(f"Run {run_id} saved as baseline '{args.baseline}'")
+            sys.exit(0)
+        baseline_id = resolve_run(conn, args.baseline)
+    except KeyError as e:
+        print(f"{RED}{e.args[0]}{RESET}")
+        sys.exit(2)
+
+    rows = compare(
+        load_timings(conn, baseline_id),
+        load_timings(conn, run_id),
+        args.min_effect,
+        args.alpha,
+    )
+    print(f"Baseline {args.baseline} ({baseline_id}) vs {args.run} ({run_id})")
+    print_comparison(rows, args.all)
+
+    floor = min_adjusted_p(rows)
+    if floor >= args.alpha:
+        # With few runs per size and many sizes, the correction leaves no
+        # p-value that could pass: a silent pass would mean nothing
+        print(
+            f"\n{RED}Cannot detect regressions: with these run counts the "
+            f"smallest corrected p-value over {len(rows)} sizes is {floor:.3g}, "
+            f"not below --alpha {args.alpha}. Record both runs with a larger "
+            f"--repeat.{RESET}"
+        )
+        sys.exit(3)
+
+    regressions = sum(row["verdict"] == "regression" for row in rows)
+    improvements = sum(row["verdict"] == "improvement" for row in rows)
+    color = RED if regressions else GREEN
+    print(
+        f"\n{color}{len(rows)} sizes compared: {regressions} regressions, "
+        f"{improvements} improvements{RESET}"
+    )
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,254 @@
+"""Empirical complexity fits of solver timings: exponents, outliers and budgets."""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from cost_model import log_work
+
+PARAMS = ("n1", "n2", "k")
+# Two-sided 95% Student t quantiles by degrees of freedom (the next larger
+# tabulated dof is used, which is conservative); the normal quantile beyond
+T_975 = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    12: 2.179,
+    15: 2.131,
+    20: 2.086,
+    30: 2.042,
+    60: 2.000,
+    120: 1.980,
+}
+# Robust z-score (from the median absolute deviation) above which a point is
+# an outlier
+OUTLIER_Z = 3.5
+# Largest parameter value considered when extrapolating to a budget
+SEARCH_LIMIT = 1 << 24
+
+
+class Fit(NamedTuple):
+    """Least-squares line y = intercept + slope * x with a 95% CI of the slope."""
+
+    intercept: float
+    slope: float
+    slope_low: float
+    slope_high: float
+    r2: float
+    residuals: np.ndarray
+
+
+def t_quantile(dof):
+    for tabulated in sorted(T_975):
+        if dof <= tabulated:
+            return T_975[tabulated]
+    return 1.960
+
+
+def linear_fit(x, y):
+    """Ordinary least squares of y on x."""
+    A = np.column_stack([np.ones_like(x), x])
+    (intercept, slope), *_ = np.linalg.lstsq(A, y, rcond=None)
+    residuals = y - (intercept + slope * x)
+    dof = len(x) - 2
+    sxx = ((x - x.mean()) ** 2).sum()
+    ss_res = (residuals**2).sum()
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    r2 = 1 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    if dof > 0 and sxx > 0:
+        half = t_quantile(dof) * math.sqrt(ss_res / dof / sxx)
+    else:
+        half = math.inf
+    return Fit(intercept, slope, slope - half, slope + half, r2, residuals)
+
+
+def outliers(residuals):
+    """Indices of points whose residual is far from the rest (robust z-score)."""
+    deviation = np.abs(residuals - np.median(residuals))
+    mad = np.median(deviation)
+    if mad == 0:
+        return []
+    return np.flatnonzero(0.6745 * deviation / mad > OUTLIER_Z)
+
+
+def model_log_work(algo, fixed, x_col, xs):
+    """log of the cost model's work for each value of the varied parameter."""
+    params = dict(fixed)
+    values = []
+    for x in xs:
+        params[x_col] = int(x)
+        values.append(log_work(algo, params["n1"], params["n2"], params["k"]))
+    return np.array(values)
+
+
+def max_within_budget(predict, budget, start):
+    """
+    Largest integer x >= start with predict(x) <= budget, for a predict that
+    grows with x. None if start is already over budget; SEARCH_LIMIT if the
+    budget is never exceeded below it.
+    """
+    if predict(start) > budget:
+        return None
+    low, high = start, start * 2
+    while high < SEARCH_LIMIT and predict(high) <= budget:
+        low, high = high, high * 2
+    if high >= SEARCH_LIMIT:
+        return SEARCH_LIMIT if predict(SEARCH_LIMIT) <= budget else low
+    while high - low > 1:
+        mid = (low + high) // 2
+        if predict(mid) <= budget:
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def fit_scenario(algo, x_col, fixed, xs, times_ms, budget_ms):
+    """
+    Fits one scenario (one varied parameter, the others fixed): a power law
+    log t = a + b log x, and the cost model log t = a + beta log W(x). The
+    approximate solver is expected to be polynomial and is extrapolated with
+    the power law; the exact solver with the combinatorial model.
+    """
+    y = np.log(times_ms)
+    power = linear_fit(np.log(xs), y)
+    work = model_log_work(algo, fixed, x_col, xs)
+    model = linear_fit(work, y) if np.ptp(work) > 0 else None
+
+    if algo == "exact" and model is not None:
+        chosen = model
+
+        def predict(x):
+            w = model_log_work(algo, fixed, x_col, [x])[0]
+            return model.intercept + model.slope * w
+
+    else:
+        chosen = power
+
+        def predict(x):
+            return power.intercept + power.slope * math.log(x)
+
+    start = int(xs.min())
+    return {
+        "power": power,
+        "model": model,
+        "r2": chosen.r2,
+        "outliers": [int(xs[i]) for i in outliers(chosen.residuals)],
+        "max_x": max_within_budget(predict, math.log(budget_ms), max(start, 1)),
+    }
+
+
+def analyze(df, budget_s=300.0, min_points=3):
+    """
+    Fit every scenario of a timing frame with exp_type, algo, graph_type,
+    n1, n2, k and time_ms columns, averaging repeated sizes first. Returns
+    one report row per (algo, graph type, varied parameter, fixed values).
+    """
+    keys = ["exp_type", "algo", "graph_type", *PARAMS]
+    if "graph_type" not in df.columns:
+        df = df.assign(graph_type="")
+    df = df[df["time_ms"] > 0]
+    avg = df.groupby(keys, observed=True)["time_ms"].mean().reset_index()
+
+    report = []
+    for (exp, algo, graph_type), group in avg.groupby(
+        ["exp_type", "algo", "graph_type"], observed=True
+    ):
+        if exp not in PARAMS:
+            continue
+        fixed_cols = [p for p in PARAMS if p != exp]
+        for fixed_vals, scenario in group.groupby(fixed_cols):
+            scenario = scenario.sort_values(exp)
+            if len(scenario) < min_points:
+                continue
+            fixed = dict(zip(fixed_cols, map(int, fixed_vals)))
+            xs = scenario[exp].to_numpy(dtype=np.float64)
+            fit = fit_scenario(
+                algo, exp, fixed, xs, scenario["time_ms"].to_numpy(), budget_s * 1000
+            )
+            report.append(
+                {
+                    "algo": algo,
+                    "graph_type": graph_type,
+                    "vary": exp,
+                    "fixed": fixed,
+                    "points": len(scenario),
+                    **fit,
+                }
+            )
+    return report
+
+
+def format_ci(fit):
+    if fit is None:
+        return "-"
+    return f"{fit.slope:.2f} [{fit.slope_low:.2f}, {fit.slope_high:.2f}]"
+
+
+def print_report(report, budget_s):
+    print(
+        f"{'Algo':<7} {'Type':<10} {'Vary':<5} {'Fixed':<16} {'Pts':<4} "
+        f"{'Exponent (95% CI)':<22} {'Model beta (95% CI)':<22} {'R2':<6} "
+        f"{'Max @ ' + format(budget_s, 'g') + 's':<12} Outliers"
+    )
+    print("-" * 120)
+    for row in report:
+        fixed = ", ".join(f"{p}={v}" for p, v in row["fixed"].items())
+        max_x = row["max_x"]
+        if max_x is None:
+            max_x = "none"
+        elif max_x >= SEARCH_LIMIT:
+            max_x = f">{SEARCH_LIMIT}"
+        print(
+            f"{row['algo']:<7} {str(row['graph_type']):<10} {row['vary']:<5} "
+            f"{fixed:<16} {row['points']:<4} {format_ci(row['power']):<22} "
+            f"{format_ci(row['model']):<22} {row['r2']:<6.3f} {str(max_x):<12} "
+            f"{', '.join(map(str, row['outliers'])) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    from generate_plots import load_results, parse_log_file
+    from results_store import DEFAULT_DB
+
+    parser = argparse.ArgumentParser(description="Fit solver scaling")
+    parser.add_argument(
+        "log",
+        nargs="?",
+        default=None,
+        help="Execution log to analyze (default: the results store)",
+    )
+    parser.add_argument("--db", type=str, default=DEFAULT_DB, help="Results store")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=300.0,
+        help="Time budget (seconds) to extrapolate the largest size for",
+    )
+    parser.add_argument(
+        "--min-points",
+        type=int,
+        default=3,
+        help="Fewest distinct sizes a scenario needs to be fitted",
+    )
+    args = parser.parse_args()
+
+    if args.log is None and not os.path.exists(args.db):
+        parser.error(f"{args.db} not found; pass an execution log")
+    df = parse_log_file(args.log) if args.log else load_results(args.db)
+    if df.empty:
+        raise SystemExit(1)
+
+    report = analyze(df, args.budget, args.min_points)
+    print_report(report, args.budget)
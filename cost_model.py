@@ -0,0 +1,117 @@
+"""Run-time predictions for solver tests, calibrated from the results store."""
+
+import math
+import os
+import sqlite3
+import statistics
+
+from exact_solver import missing_vertices
+
+# Calibrated per-mode runs needed before predictions are trusted
+MIN_SAMPLES = 5
+# Per-test timeouts are the prediction times this factor, plus the slack, capped
+# by the runner's limit
+TIMEOUT_FACTOR = 3.0
+TIMEOUT_SLACK = 10.0
+# Largest exponent math.exp accepts; bigger predictions are infinite
+MAX_LOG = 700.0
+
+
+def log_comb(log_n, n, k):
+    """log C(n, k) for a possibly astronomically large n given with its log."""
+    if log_n < 30:
+        return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+    # n >> k: C(n, k) ~ n^k / k!
+    return k * log_n - math.lgamma(k + 1)
+
+
+def log_add(a, b):
+    """log(exp(a) + exp(b)) without overflow."""
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+
+def log_work(mode, n1, n2, k):
+    """
+    Natural log of the work units a solve takes, up to a constant factor.
+    Both modes read and write the (extended) N x N matrix. The exact solver
+    visits C(C(N, n2), k) * (n2!)^k assignments, each copying G and checking
+    k copies of H; the approximate solver places k copies once.
+    """
+    N = n1 + missing_vertices(n1, n2, k)
+    io = math.log(2 * N * N + 1)
+    if mode != "exact":
+        return log_add(io, math.log(k * n2 * n2 + 1))
+
+    log_subsets = math.lgamma(N + 1) - math.lgamma(n2 + 1) - math.lgamma(N - n2 + 1)
+    subsets = math.comb(N, n2) if log_subsets < 30 else math.inf
+    log_assignments = log_comb(log_subsets, subsets, k) + k * math.lgamma(n2 + 1)
+    return log_add(io, log_assignments + math.log(N * N + k * n2 * n2 + 1))
+
+
+class CostModel:
+    """
+    Per mode, predicted seconds = base + exp(log_rate) * work: base is the
+    fixed cost of a run (startup, small reads), log_rate the seconds per unit
+    of work on this machine. Modes without enough history have no prediction.
+    """
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    @classmethod
+    def calibrate(cls, db_path, binary_hash=None):
+        """
+        Fit the model to the store's average times per (mode, n1, n2, k),
+        restricted to the given solver binary when it has enough history.
+        """
+        if not os.path.exists(db_path):
+            return cls()
+        query = (
+            "SELECT mode, n1, n2, k, AVG(elapsed) FROM results "
+            "WHERE status = 'ok' AND elapsed IS NOT NULL AND n1 IS NOT NULL {} "
+            "GROUP BY mode, n1, n2, k"
+        )
+        with sqlite3.connect(db_path) as conn:
+            rows = []
+            if binary_hash is not None:
+                rows = conn.execute(
+                    query.format("AND binary_hash = ?"), (binary_hash,)
+                ).fetchall()
+            if len(rows) < MIN_SAMPLES:
+                rows = conn.execute(query.format("")).fetchall()
+
+        by_mode = {}
+        for mode, n1, n2, k, elapsed in rows:
+            by_mode.setdefault(mode, []).append((log_work(mode, n1, n2, k), elapsed))
+
+        params = {}
+        for mode, samples in by_mode.items():
+            if len(samples) < MIN_SAMPLES:
+                continue
+            # The cheapest sizes are dominated by the fixed cost
+            times = sorted(elapsed for _, elapsed in samples)
+            base = times[len(times) // 10]
+            rates = [
+                math.log(elapsed - base) - work
+                for work, elapsed in samples
+                if elapsed > 2 * base
+            ]
+            if rates:
+                params[mode] = (base, statistics.median(rates))
+        return cls(params)
+
+    def predict(self, mode, n1, n2, k):
+        """Predicted seconds for a test, or None if the mode is uncalibrated."""
+        if mode not in self.params:
+            return None
+        base, log_rate = self.params[mode]
+        log_time = log_rate + log_work(mode, n1, n2, k)
+        if log_time > MAX_LOG:
+            return math.inf
+        return base + math.exp(log_time)
+
+    def timeout(self, predicted, limit):
+        """Per-test timeout: generous headroom over the prediction, capped at limit."""
+        if predicted is None or predicted * TIMEOUT_FACTOR >= limit:
+            return limit
+        return min(limit, math.ceil(predicted * TIMEOUT_FACTOR + TIMEOUT_SLACK))
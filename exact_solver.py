@@ -0,0 +1,187 @@
+"""Reference exact solver: branch-and-bound over placements of H, mirroring ExactSolver."""
+
+import math
+import sys
+from itertools import combinations, permutations
+
+import numpy as np
+
+from generate_graphs import read_test_input
+
+# Upper bound on cells evaluated at once when costing placements
+COST_BLOCK_CELLS = 1 << 22
+# Edge counts are small, so costs are evaluated in a narrow dtype to save bandwidth
+COST_DTYPE = np.int16
+
+
+def missing_vertices(n1, n2, k):
+    """Vertices added to G until it has at least k distinct n2-subsets."""
+    m = 0
+    while math.comb(n1 + m, n2) < k:
+        m += 1
+    return m
+
+
+def distinct_placements(H):
+    """
+    Permutations of H's vertices that place H differently on a fixed subset.
+    Two permutations that differ by an automorphism of H require exactly the
+    same edges, so only one permutation per orbit is kept. Returns the kept
+    permutations p (H vertex u goes to subset position p[u]) and the patterns
+    they place, pattern[i][j] being the edges required between positions i, j.
+    """
+    n2 = len(H)
+    perms = np.array(list(permutations(range(n2))), dtype=np.int64).reshape(-1, n2)
+    inverse = np.argsort(perms, axis=1)
+    patterns = H[inverse[:, :, None], inverse[:, None, :]]
+    _, kept = np.unique(patterns.reshape(len(perms), -1), axis=0, return_index=True)
+    kept.sort()
+    return perms[kept], patterns[kept]
+
+
+def placement_costs(R, subsets, patterns):
+    """
+    Edges each placement would add to R, as a (len(subsets), len(patterns))
+    array, evaluated in blocks of subsets.
+    """
+    n2 = subsets.shape[1]
+    costs = np.empty((len(subsets), len(patterns)), dtype=np.int64)
+    flat = patterns.reshape(1, len(patterns), n2 * n2).astype(COST_DTYPE)
+    step = max(1, COST_BLOCK_CELLS // max(len(patterns) * n2 * n2, 1))
+    for start in range(0, len(subsets), step):
+        block = subsets[start : start + step]
+        present = R[block[:, :, None], block[:, None, :]].astype(COST_DTYPE)
+        deficit = flat - present.reshape(len(block), 1, n2 * n2)
+        np.maximum(deficit, 0, out=deficit)
+        costs[start : start + step] = deficit.sum(axis=2, dtype=np.int64)
+    return costs
+
+
+class _Search:
+    """Depth-first branch-and-bound over k placements in increasing subset order."""
+
+    def __init__(self, R, subsets, patterns, k):
+        self.subsets = subsets
+        self.patterns = patterns
+        self.k = k
+        self.best_cost = None
+        self.best = None
+        self.nodes = 0
+        self._greedy(R)
+
+    def _apply(self, R, s, q):
+        S = self.subsets[s]
+        R = R.copy()
+        cells = np.ix_(S, S)
+        R[cells] = np.maximum(R[cells], self.patterns[q])
+        return R
+
+    def _greedy(self, R):
+        """Initial incumbent: repeatedly take the cheapest remaining placement."""
+        cost, chosen, last = 0, [], -1
+        for depth in range(self.k):
+            # Keep enough later subsets for the remaining copies
+            stop = len(self.subsets) - (self.k - depth - 1)
+            costs = placement_costs(R, self.subsets[last + 1 : stop], self.patterns)
+            s, q = np.unravel_index(np.argmin(costs), costs.shape)
+            cost += int(costs[s, q])
+            s += last + 1
+            chosen.append((int(s), int(q)))
+            R = self._apply(R, s, q)
+            last = s
+        self.best_cost, self.best = cost, (R, chosen)
+
+    def run(self, R, cost=0, last=-1, chosen=()):
+        self.nodes += 1
+        depth = len(chosen)
+        if depth == self.k:
+            if cost < self.best_cost:
+                self.best_cost, self.best = cost, (R, list(chosen))
+            return
+
+        remaining = self.k - depth
+        candidates = self.subsets[last + 1 :]
+        costs = placement_costs(R, candidates, self.patterns)
+
+        # R only grows, so the final cost is at least cost + the increment of
+        # any single future placement against R; the remaining copies use
+        # `remaining` distinct subsets, hence the remaining-th smallest bound.
+        cheapest = costs.min(axis=1)
+        bound = np.partition(cheapest, remaining - 1)[remaining - 1]
+        if cost + bound >= self.best_cost:
+            return
+
+        if remaining == 1:
+            # The bound is exact for the last copy: take the cheapest placement
+            s, q = np.unravel_index(np.argmin(costs), costs.shape)
+            s += last + 1
+            self.best_cost = cost + int(bound)
+            self.best = (self._apply(R, s, q), list(chosen) + [(int(s), int(q))])
+            return
+
+        usable = len(candidates) - (remaining - 1)
+        order = np.argsort(costs[:usable], axis=None, kind="stable")
+        for flat in order:
+            s, q = divmod(int(flat), len(self.patterns))
+            added = int(costs[s, q])
+            if cost + added >= self.best_cost:
+                break
+            s += last + 1
+            self.run(self._apply(R, s, q), cost + added, s, chosen + ((s, q),))
+
+
+def solve(G, H, k):
+    """
+    Solve like ExactSolver.Solve: returns (extended G, edits, selections),
+    selections[i][u] being the vertex of the extended G that H's vertex u is
+    mapped to in the i-th copy.
+    """
+    n1, n2 = len(G), len(H)
+    m = missing_vertices(n1, n2, k)
+    N = n1 + m
+
+    R = np.zeros((N, N), dtype=np.int64)
+    R[:n1, :n1] = G
+
+    subsets = np.array(list(combinations(range(N), n2)), dtype=np.int64)
+    perms, patterns = distinct_placements(H)
+
+    search = _Search(R, subsets, patterns, k)
+    search.run(R)
+
+    extended, chosen = search.best
+    selections = [subsets[s][perms[q]] for s, q in chosen]
+    return extended, m + search.best_cost, selections
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Reference exact solver")
+    parser.add_argument("input", help="Test input file")
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="Solver report to cross-check the optimal edit count against",
+    )
+    args = parser.parse_args()
+
+    G, H, k = read_test_input(args.input)
+    start = time.perf_counter()
+    extended, edits, selections = solve(G, H, k)
+    elapsed = time.perf_counter() - start
+
+    print(f"Solution found with {edits} editions in {elapsed:.3f}s")
+    for i, selection in enumerate(selections, 1):
+        print(f"Nr {i}: G: {' '.join(map(str, selection))}")
+
+    if args.compare:
+        from verify_outputs import read_output
+
+        reported = read_output(args.compare)[0]
+        if reported != edits:
+            print(f"MISMATCH: {args.compare} reports {reported} editions")
+            sys.exit(1)
+        print(f"{args.compare} agrees")
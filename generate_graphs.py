@@ -1,7 +1,108 @@
+import gzip
+import math
+import os
+import pickle
 import random
-from typing import Callable, Optional
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Optional
 
+import numpy as np
 
+# Kernels fill the adjacency matrix in blocks of rows so that temporary arrays
+# (random floats etc.) stay bounded regardless of n.
+KERNEL_DTYPE = np.int8
+ROW_BLOCK_CELLS = 1 << 22
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Optional compression of test inputs: name -> file suffix after ".txt". zstd
+# needs the zstandard package.
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Bump whenever a given seed and recipe would produce different file contents,
+# so that manifests written by generate_tests.py regenerate stale inputs.
+GENERATOR_VERSION = 1
+
+Kernel = Callable[[np.random.Generator, int, int, int], np.ndarray]
+Edges = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def with_kernel(kernel: Kernel):
+    """Attach a vectorized kernel to a per-cell edge function.
+
+    A kernel is called as kernel(rng, n, start, stop) and returns rows
+    start..stop-1 of the n x n adjacency matrix.
+    """
+
+    def decorate(edge_func):
+        edge_func.kernel = kernel
+        return edge_func
+
+    return decorate
+
+
+def with_edges(edges):
+    """Attach an edge-list generator (and a kernel derived from it) to an edge function.
+
+    An edge-list generator is called as edges(rng, n, start, stop) and returns
+    (rows, cols, counts) arrays for the non-zero cells in rows start..stop-1,
+    so sparse and structured families cost O(edges) instead of O(n^2).
+    """
+
+    def kernel(rng: np.random.Generator, n: int, start: int, stop: int) -> np.ndarray:
+        block = np.zeros((stop - start, n), dtype=KERNEL_DTYPE)
+        rows, cols, counts = edges(rng, n, start, stop)
+        block[rows - start, cols] = counts
+        return block
+
+    def decorate(edge_func):
+        edge_func.edges = edges
+        edge_func.kernel = kernel
+        return edge_func
+
+    return decorate
+
+
+def _dense_kernel(
+    rng: np.random.Generator, n: int, start: int, stop: int
+) -> np.ndarray:
+    u = rng.random((stop - start, n), dtype=np.float32)
+    return ((u < 0.8) * (1 + (u < 0.4))).astype(KERNEL_DTYPE)
+
+
+def _chain_edges(rng: np.random.Generator, n: int, start: int, stop: int) -> Edges:
+    rows = np.arange(start, min(stop, n - 1))
+    return rows, rows + 1, np.ones(len(rows), dtype=KERNEL_DTYPE)
+
+
+def _sample_cells(rng: np.random.Generator, cells: int, p: float) -> np.ndarray:
+    """Indices of successes among `cells` Bernoulli(p) trials, via geometric skipping."""
+    chunks = []
+    last = -1
+    while True:
+        expected = (cells - last - 1) * p
+        gaps = rng.geometric(p, size=int(expected + 4 * expected**0.5) + 16)
+        positions = last + np.cumsum(gaps)
+        chunks.append(positions[positions < cells])
+        if positions[-1] >= cells:
+            return np.concatenate(chunks)
+        last = positions[-1]
+
+
+def _sparse_edges(rng: np.random.Generator, n: int, start: int, stop: int) -> Edges:
+    rows, cols = np.divmod(_sample_cells(rng, (stop - start) * n, 0.2), n)
+    return start + rows, cols, np.ones(len(rows), dtype=KERNEL_DTYPE)
+
+
+def _default_multi_kernel(
+    rng: np.random.Generator, n: int, start: int, stop: int
+) -> np.ndarray:
+    return rng.integers(0, 4, size=(stop - start, n), dtype=KERNEL_DTYPE)
+
+
+@with_kernel(_dense_kernel)
 def dense_edge_func(u: int, v: int, n: int) -> int:
     """Dense graph: 80% chance of 1-2 edges."""
     if random.random() < 0.8:
@@ -9,6 +110,7 @@ def dense_edge_func(u: int, v: int, n: int) -> int:
     return 0
 
 
+@with_edges(_chain_edges)
 def chain_edge_func(u: int, v: int, n: int) -> int:
     """Chain: 0→1→2→3→... (like train cars)"""
     return 1 if v == u + 1 else 0
@@ -22,7 +124,15 @@ def clique_edge_func(clique_size: int):
             return 1
         return 0
 
-    return edge_func
+    def edges(rng: np.random.Generator, n: int, start: int, stop: int) -> Edges:
+        size = min(clique_size, n)
+        members = np.arange(start, min(stop, size))
+        rows = np.repeat(members, size)
+        cols = np.tile(np.arange(size), len(members))
+        mask = rows != cols
+        return rows[mask], cols[mask], np.ones(int(mask.sum()), dtype=KERNEL_DTYPE)
+
+    return with_edges(edges)(edge_func)
 
 
 def grid_edge_func(width: int):
@@ -39,39 +149,114 @@ def grid_edge_func(width: int):
             return 1
         return 0
 
-    return edge_func
+    def edges(rng: np.random.Generator, n: int, start: int, stop: int) -> Edges:
+        nodes = np.arange(start, stop)
+        right = nodes[(nodes % width != width - 1) & (nodes + 1 < n)]
+        bottom = nodes[nodes + width < n]
+        rows = np.concatenate([right, bottom])
+        cols = np.concatenate([right + 1, bottom + width])
+        return rows, cols, np.ones(len(rows), dtype=KERNEL_DTYPE)
 
+    return with_edges(edges)(edge_func)
 
+
+@with_edges(_sparse_edges)
 def sparse_edge_func(u: int, v: int, n: int) -> int:
     """Sparse graph: 20% chance of 1 edge."""
     return 1 if random.random() < 0.2 else 0
 
 
+@with_kernel(_default_multi_kernel)
 def default_multi_edge_func(u: int, v: int, n: int) -> int:
     """Multigraph: random 0-3 edges."""
     return random.randint(0, 3)
 
 
-def generate_graph(
+def iter_row_blocks(
+    n: int,
+    kernel: Kernel,
+    rng: np.random.Generator,
+    allow_loops: bool = False,
+):
+    """Yield (start, block) pairs covering the adjacency matrix produced by kernel."""
+    step = max(1, ROW_BLOCK_CELLS // max(n, 1))
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        block = kernel(rng, n, start, stop)
+        if not allow_loops:
+            rows = np.arange(start, stop)
+            block[rows - start, rows] = 0
+        yield start, block
+
+
+def iter_edge_blocks(
+    n: int,
+    edges,
+    rng: np.random.Generator,
+    allow_loops: bool = False,
+):
+    """
+    Yield (start, stop, rows, cols, counts) edge lists covering the graph in
+    the same row blocks as iter_row_blocks, so both consume rng identically.
+    """
+    step = max(1, ROW_BLOCK_CELLS // max(n, 1))
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        rows, cols, counts = edges(rng, n, start, stop)
+        if not allow_loops:
+            mask = rows != cols
+            rows, cols, counts = rows[mask], cols[mask], counts[mask]
+        yield start, stop, rows, cols, counts
+
+
+def iter_graph_blocks(
     n: int,
     edge_func: Callable[[int, int, int], int] = default_multi_edge_func,
     allow_loops: bool = False,
-) -> list[list[int]]:
-    """Generate a directed multigraph as an adjacency matrix."""
-    matrix = [[0] * n for _ in range(n)]
+    rng: Optional[np.random.Generator] = None,
+):
+    """
+    Yield the adjacency matrix of a generated graph as consecutive blocks of rows.
+    Uses the edge function's vectorized kernel when it has one, otherwise
+    calls edge_func for every cell and yields one row at a time.
+    """
+    kernel = getattr(edge_func, "kernel", None)
+    if kernel is not None:
+        if rng is None:
+            rng = np.random.default_rng()
+        for _, block in iter_row_blocks(n, kernel, rng, allow_loops):
+            yield block
+        return
 
     for u in range(n):
+        row = [0] * n
         for v in range(n):
             if u == v and not allow_loops:
                 continue
 
-            edge_count = edge_func(u, v, n)
-            matrix[u][v] = edge_count
+            row[v] = edge_func(u, v, n)
+        yield np.array([row], dtype=np.int64)
+
+
+def generate_graph(
+    n: int,
+    edge_func: Callable[[int, int, int], int] = default_multi_edge_func,
+    allow_loops: bool = False,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """Generate a directed multigraph as an adjacency matrix."""
+    dtype = KERNEL_DTYPE if hasattr(edge_func, "kernel") else np.int64
+    matrix = np.empty((n, n), dtype=dtype)
+
+    start = 0
+    for block in iter_graph_blocks(n, edge_func, allow_loops, rng):
+        matrix[start : start + len(block)] = block
+        start += len(block)
 
     return matrix
 
 
-def matrix_to_string(matrix: list[list[int]]) -> str:
+def matrix_to_string(matrix) -> str:
     n = len(matrix)
     lines = [str(n)]
     for row in matrix:
@@ -79,6 +264,108 @@ def matrix_to_string(matrix: list[list[int]]) -> str:
     return "\n".join(lines)
 
 
+def compression_of(filename: str) -> str:
+    """Compression of a test input, from its suffix (see COMPRESSIONS)."""
+    for name, suffix in COMPRESSIONS.items():
+        if suffix and str(filename).endswith(suffix):
+            return name
+    return "none"
+
+
+def open_input(filename: str, mode: str = "rb"):
+    """
+    Open a test input for binary reading ("rb") or writing ("wb"), compressing
+    or decompressing by its suffix. Written gzip files carry no timestamp, so
+    the same recipe gives the same bytes.
+    """
+    compression = compression_of(filename)
+    if compression == "gzip":
+        return gzip.GzipFile(filename, mode, GZIP_LEVEL, mtime=0)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.open(
+            filename, mode, cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        )
+    return open(filename, mode, buffering=WRITE_BUFFER_SIZE)
+
+
+def read_test_input(filename: str) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Read a test input file (optionally compressed) back into (G, H, k).
+    k defaults to 1 when the file does not specify it, as in the solver.
+    """
+    with open_input(filename) as f:
+        numbers = np.fromstring(f.read(), dtype=np.int64, sep=" ")
+
+    n1 = int(numbers[0])
+    G = numbers[1 : 1 + n1 * n1].reshape(n1, n1)
+    pos = 1 + n1 * n1
+    n2 = int(numbers[pos])
+    H = numbers[pos + 1 : pos + 1 + n2 * n2].reshape(n2, n2)
+    pos += 1 + n2 * n2
+    k = int(numbers[pos]) if pos < len(numbers) else 1
+    return G, H, k
+
+
+def format_rows(block: np.ndarray) -> bytes:
+    """Format a block of adjacency-matrix rows as newline-terminated text lines."""
+    if block.size and block.min() >= 0 and block.max() < 10:
+        # Single-digit cells: lay out digits and separators directly as bytes.
+        rows, n = block.shape
+        out = np.full((rows, 2 * n), ord(" "), dtype=np.uint8)
+        out[:, 0::2] = block + ord("0")
+        out[:, -1] = ord("\n")
+        return out.tobytes()
+
+    return "".join(" ".join(map(str, row)) + "\n" for row in block.tolist()).encode()
+
+
+def format_sparse_rows(
+    n: int,
+    start: int,
+    stop: int,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    counts: np.ndarray,
+) -> bytes:
+    """Format rows start..stop-1 given only their non-zero cells."""
+    if len(counts) and (counts.min() < 0 or counts.max() >= 10):
+        block = np.zeros((stop - start, n), dtype=np.int64)
+        block[rows - start, cols] = counts
+        return format_rows(block)
+
+    # Stamp the edges onto copies of an all-zero row instead of formatting cells.
+    zero_row = np.full(2 * n, ord(" "), dtype=np.uint8)
+    zero_row[0::2] = ord("0")
+    zero_row[-1] = ord("\n")
+    out = np.tile(zero_row, (stop - start, 1))
+    out[rows - start, 2 * cols] = counts + ord("0")
+    return out.tobytes()
+
+
+def write_graph(
+    f,
+    n: int,
+    edge_func: Callable[[int, int, int], int] = default_multi_edge_func,
+    allow_loops: bool = False,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """Stream a generated graph to a binary file handle, block by block."""
+    f.write(f"{n}\n".encode())
+
+    edges = getattr(edge_func, "edges", None)
+    if edges is not None:
+        if rng is None:
+            rng = np.random.default_rng()
+        for block_edges in iter_edge_blocks(n, edges, rng, allow_loops):
+            f.write(format_sparse_rows(n, *block_edges))
+        return
+
+    for block in iter_graph_blocks(n, edge_func, allow_loops, rng):
+        f.write(format_rows(block))
+
+
 def generate_test_input(
     n1: int,
     n2: int,
@@ -86,13 +373,15 @@ def generate_test_input(
     edge_func1: Callable[[int, int, int], int] = default_multi_edge_func,
     edge_func2: Callable[[int, int, int], int] = default_multi_edge_func,
     allow_loops: bool = False,
+    rng: Optional[np.random.Generator] = None,
 ) -> str:
     """
     Generate a complete test input file with two directed multigraphs and k parameter.
     If k is not provided its value is random.
+    Builds the whole file in memory; use write_test_input for large graphs.
     """
-    graph1 = generate_graph(n1, edge_func1, allow_loops)
-    graph2 = generate_graph(n2, edge_func2, allow_loops)
+    graph1 = generate_graph(n1, edge_func1, allow_loops, rng)
+    graph2 = generate_graph(n2, edge_func2, allow_loops, rng)
 
     if k is None:
         k = random.randint(1, max(n1, n2))
@@ -103,6 +392,30 @@ def generate_test_input(
     return result
 
 
+def write_test_input(
+    f,
+    n1: int,
+    n2: int,
+    k: Optional[int] = None,
+    edge_func1: Callable[[int, int, int], int] = default_multi_edge_func,
+    edge_func2: Callable[[int, int, int], int] = default_multi_edge_func,
+    allow_loops: bool = False,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Stream a complete test input to a binary file handle.
+    Produces the same bytes as generate_test_input for the same rng state,
+    but memory use does not depend on n1 and n2.
+    """
+    write_graph(f, n1, edge_func1, allow_loops, rng)
+    write_graph(f, n2, edge_func2, allow_loops, rng)
+
+    if k is None:
+        k = random.randint(1, max(n1, n2))
+
+    f.write(f"{k}".encode())
+
+
 def save_test_input(
     filename: str,
     n1: int,
@@ -111,36 +424,185 @@ def save_test_input(
     edge_func1: Callable[[int, int, int], int] = default_multi_edge_func,
     edge_func2: Callable[[int, int, int], int] = default_multi_edge_func,
     allow_loops: bool = False,
+    rng: Optional[np.random.Generator] = None,
 ) -> None:
-    """Generate and save test input to a file."""
-    content = generate_test_input(n1, n2, k, edge_func1, edge_func2, allow_loops)
-    with open(filename, "w") as f:
-        f.write(content)
-    print(f"Generated test input saved to {filename}")
+    """Generate and save test input to a file, compressed if its name says so."""
+    with open_input(filename, "wb") as f:
+        write_test_input(f, n1, n2, k, edge_func1, edge_func2, allow_loops, rng)
+
+
+def preset_edge_func(
+    graph_type: str,
+    clique_size: Optional[int] = None,
+    grid_width: Optional[int] = None,
+) -> Callable[[int, int, int], int]:
+    """Return the edge function for a graph type preset ("random" is "default")."""
+    if graph_type == "clique":
+        return clique_edge_func(clique_size)
+    if graph_type == "grid":
+        return grid_edge_func(grid_width)
+
+    return {
+        "sparse": sparse_edge_func,
+        "default": default_multi_edge_func,
+        "random": default_multi_edge_func,
+        "dense": dense_edge_func,
+        "chain": chain_edge_func,
+    }[graph_type]
 
 
-def generate_testset(
+def file_seed(
+    seed: int, graph_type: str, n1: int, n2: int, k: Optional[int], index: int
+) -> np.random.SeedSequence:
+    """
+    Seed for a single test file, derived only from its recipe so that the output
+    does not depend on how files are scheduled across workers.
+    """
+    type_key = zlib.crc32(graph_type.encode())
+    return np.random.SeedSequence([seed, type_key, n1, n2, k or 0, index])
+
+
+def testset_jobs(
     output_dir: str,
     count: int,
     n1: int,
     n2: int,
     k: Optional[int],
     allow_loops: bool = False,
-    edge_func: Callable[[int, int, int], int] = default_multi_edge_func,
+    graph_type: str = "default",
     prefix: str = "test",
-) -> list[str]:
-    """Generate multiple test cases, each saved to a separate file."""
-    import os
-
-    os.makedirs(output_dir, exist_ok=True)
+    seed: Optional[int] = None,
+    clique_size: Optional[int] = None,
+    grid_width: Optional[int] = None,
+    compress: str = "none",
+) -> list[dict]:
+    """
+    Describe the files of a test set as picklable jobs for generate_file.
+    Compressed files get the suffix of their compression after ".txt".
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
 
-    files = []
+    suffix = COMPRESSIONS[compress]
+    jobs = []
     for i in range(1, count + 1):
         filename = os.path.join(
-            output_dir, f"{prefix}_n1_{n1:06d}_n2_{n2:06d}_k_{k:03d}_{i:03d}.txt"
+            output_dir,
+            f"{prefix}_n1_{n1:06d}_n2_{n2:06d}_k_{k:03d}_{i:03d}.txt{suffix}",
         )
-        save_test_input(filename, n1, n2, k, edge_func, edge_func, allow_loops)
-        files.append(filename)
+        jobs.append(
+            {
+                "filename": filename,
+                "n1": n1,
+                "n2": n2,
+                "k": k,
+                "index": i,
+                "allow_loops": allow_loops,
+                "graph_type": graph_type,
+                "clique_size": clique_size or max(n1, n2),
+                "grid_width": grid_width or int(math.sqrt(max(n1, n2))),
+                "seed": seed,
+            }
+        )
+    return jobs
+
+
+def generate_file(job: dict) -> str:
+    """Generate one test file described by a testset_jobs entry."""
+    ss = file_seed(
+        job["seed"], job["graph_type"], job["n1"], job["n2"], job["k"], job["index"]
+    )
+    # Per-cell edge functions and random k still draw from the random module.
+    random.seed(int(ss.generate_state(1)[0]))
+    rng = np.random.default_rng(ss)
+
+    edge_func = job.get("edge_func") or preset_edge_func(
+        job["graph_type"], job["clique_size"], job["grid_width"]
+    )
+    save_test_input(
+        job["filename"],
+        job["n1"],
+        job["n2"],
+        job["k"],
+        edge_func,
+        edge_func,
+        job["allow_loops"],
+        rng,
+    )
+    return job["filename"]
+
+
+def run_jobs(
+    jobs: list[dict], n_jobs: int = 1, worker: Callable[[dict], Any] = generate_file
+) -> list:
+    """
+    Run worker on every job, spreading them over n_jobs processes, with one
+    progress stream. Returns the worker results in job order.
+    """
+    for directory in sorted({os.path.dirname(job["filename"]) for job in jobs}):
+        os.makedirs(directory, exist_ok=True)
+
+    total = len(jobs)
+    results = [None] * total
+    if n_jobs <= 1:
+        for i, job in enumerate(jobs):
+            results[i] = worker(job)
+            print(f"[{i + 1}/{total}] {job['filename']}")
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = {executor.submit(worker, job): i for i, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                results[i] = future.result()
+                print(f"[{done}/{total}] {jobs[i]['filename']}")
+
+    return results
+
+
+def generate_testset(
+    output_dir: str,
+    count: int,
+    n1: int,
+    n2: int,
+    k: Optional[int],
+    allow_loops: bool = False,
+    edge_func: Optional[Callable[[int, int, int], int]] = None,
+    prefix: str = "test",
+    seed: Optional[int] = None,
+    graph_type: str = "default",
+    clique_size: Optional[int] = None,
+    grid_width: Optional[int] = None,
+    n_jobs: int = 1,
+    compress: str = "none",
+) -> list[str]:
+    """
+    Generate multiple test cases, each saved to a separate file. edge_func
+    replaces the graph_type preset; files are seeded the same either way. One
+    that cannot be pickled (e.g. a closure) is run in this process.
+    """
+    jobs = testset_jobs(
+        output_dir,
+        count,
+        n1,
+        n2,
+        k,
+        allow_loops,
+        graph_type,
+        prefix,
+        seed,
+        clique_size,
+        grid_width,
+        compress,
+    )
+    if edge_func is not None:
+        for job in jobs:
+            job["edge_func"] = edge_func
+        if n_jobs > 1:
+            try:
+                pickle.dumps(edge_func)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                n_jobs = 1
+    files = run_jobs(jobs, n_jobs)
 
     print(f"\nGenerated {count} test cases in {output_dir}/")
     return files
@@ -195,22 +657,22 @@ if __name__ == "__main__":
     parser.add_argument(
         "--seed", type=int, default=None, help="Random seed for reproducibility"
     )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSIONS),
+        default="none",
+        help="Write inputs compressed (.txt.gz, or .txt.zst with zstandard)",
+    )
 
     args = parser.parse_args()
-
-    if args.seed is not None:
-        random.seed(args.seed)
-
-    import math
-
-    edge_funcs = {
-        "sparse": sparse_edge_func,
-        "default": default_multi_edge_func,
-        "dense": dense_edge_func,
-        "chain": chain_edge_func,
-        "clique": clique_edge_func(args.clique_size or args.n1),
-        "grid": grid_edge_func(args.grid_width or int(math.sqrt(args.n1))),
-    }
+    if args.compress == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error("--compress zstd needs the zstandard package")
 
     generate_testset(
         output_dir=args.output_dir,
@@ -218,7 +680,12 @@ if __name__ == "__main__":
         n1=args.n1,
         n2=args.n2,
         k=args.k,
-        edge_func=edge_funcs[args.type],
         allow_loops=args.loops,
+        graph_type=args.type,
         prefix=args.prefix,
+        seed=args.seed,
+        clique_size=args.clique_size or args.n1,
+        grid_width=args.grid_width or int(math.sqrt(args.n1)),
+        n_jobs=args.jobs,
+        compress=args.compress,
     )
@@ -1,129 +1,379 @@
+import hashlib
+import json
 import re
+import sqlite3
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from pandas.api.types import union_categoricals
+import matplotlib
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Render headless: no display is needed, and worker processes can draw
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+from results_store import DEFAULT_DB
 
 # ---------------------------------------------------------
 # 1. HELPER FUNCTIONS
 # ---------------------------------------------------------
 
-def parse_time_to_ms(time_str):
+# Chunk size for reading log files (bytes)
+LOG_CHUNK_SIZE = 1 << 24
+# Leading bytes of a log that identify it across appends
+CACHE_FINGERPRINT_BYTES = 4096
+# Bumped whenever the parsed columns change, invalidating older caches
+LOG_CACHE_VERSION = 2
+
+# Regex Explanation (groups in LOG_COLUMNS order):
+# 1. test_(\w+)_input               -> Captures 'k', 'n1', or 'n2' from folder name
+# 2. /(approx|exact)/               -> Captures algorithm type
+# 3. /(.*?)/                        -> Captures graph type (e.g. 'random')
+# 4. n1_(\d+)_n2_(\d+)_k_(\d+)      -> Captures parameters
+# 5. :\s+(\d+):(\d+):(\d+)(:(\d+))?  -> Captures time parts H, M, S and optional ms
+LOG_PATTERN = re.compile(
+    rb"test_(\w+)_input/"
+    rb"(approx|exact)/(.*?)/"
+    rb"test_n1_(\d+)_n2_(\d+)_k_(\d+)_\d+\.txt:[ \t]+"
+    rb"(\d+):(\d+):(\d+)(?::(\d+))?"
+)
+LOG_COLUMNS = ['exp_type', 'algo', 'graph_type', 'n1', 'n2', 'k', 'h', 'm', 's', 'ms']
+
+def empty_log_frame():
+    df = pd.DataFrame({col: pd.Series(dtype='int64') for col in ['n1', 'n2', 'k']})
+    df.insert(0, 'exp_type', pd.Categorical([]))
+    df.insert(1, 'algo', pd.Categorical([]))
+    df.insert(2, 'graph_type', pd.Categorical([]))
+    df['time_ms'] = pd.Series(dtype='float64')
+    return df
+
+def parse_int_column(values):
+    """Converts a column of digit strings in one C-level parse."""
+    return np.fromstring(b' '.join(values), dtype=np.int64, sep=' ')
+
+def parse_log_chunk(data):
+    """
+    Extracts all rows of a chunk of complete lines with one regex scan, then
+    converts the columns at once.
+    """
+    matches = LOG_PATTERN.findall(data)
+    if not matches:
+        return empty_log_frame()
+
+    raw = dict(zip(LOG_COLUMNS, zip(*matches)))
+    df = pd.DataFrame({
+        col: pd.Categorical(raw[col]).rename_categories(lambda c: c.decode('utf-8'))
+        for col in ['exp_type', 'algo', 'graph_type']
+    })
+    for col in ['n1', 'n2', 'k']:
+        df[col] = parse_int_column(raw[col])
+
+    # Time parts column-wise; a missing ms part (H:M:S) counts as 0
+    h, m, sec = (parse_int_column(raw[col]) for col in ['h', 'm', 's'])
+    ms = parse_int_column(value or b'0' for value in raw['ms'])
+    df['time_ms'] = ((h * 3600000) + (m * 60000) + (sec * 1000) + ms).astype(np.float64)
+    return df
+
+def scan_log(f, offset):
+    """
+    Parses a log from byte offset in large chunks, each cut at its last
+    newline. Returns the frame of the full lines, the offset just past the
+    last of them, and the frame of a last line without a newline (kept apart
+    so it is not cached: it is parsed again once the log is appended to).
+    """
+    f.seek(offset)
+    frames = []
+    tail = b""
+    while True:
+        chunk = f.read(LOG_CHUNK_SIZE)
+        if not chunk:
+            break
+        data = tail + chunk
+        cut = data.rfind(b"\n") + 1
+        frames.append(parse_log_chunk(data[:cut]))
+        offset += cut
+        tail = data[cut:]
+    partial = parse_log_chunk(tail) if tail else empty_log_frame()
+    return concat_logs(frames), offset, partial
+
+def concat_logs(frames):
+    """Concatenates parsed frames, keeping exp_type/algo categorical."""
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return empty_log_frame()
+    for col in ['exp_type', 'algo', 'graph_type']:
+        categories = union_categoricals([df[col] for df in frames]).categories
+        for df in frames:
+            df[col] = df[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def cache_paths(filename):
+    return filename + ".cache.feather", filename + ".cache.json"
+
+def log_fingerprint(f, length):
+    """Hash of the first bytes of a log, to tell appends from rewrites."""
+    f.seek(0)
+    return hashlib.sha256(f.read(length)).hexdigest()
+
+def load_log_cache(filename, f):
     """
-    Parses string 'H:M:S:ms' (e.g., '0:00:00:096') to milliseconds (float).
+    Returns (cached frame, cache metadata) for a log, or (None, None) if there
+    is no usable cache or the log was rewritten since it was cached.
     """
+    data_path, meta_path = cache_paths(filename)
     try:
-        parts = time_str.strip().split(':')
-        if len(parts) == 4:
-            h, m, s, ms = map(int, parts)
-            return (h * 3600000) + (m * 60000) + (s * 1000) + ms
-        elif len(parts) == 3: # Fallback for H:M:S
-            h, m, s = map(int, parts)
-            return (h * 3600000) + (m * 60000) + (s * 1000)
-    except ValueError:
-        return None
-    return None
-
-def parse_log_file(filename):
-    """
-    Reads the log file line by line and extracts parameters using Regex.
-    Returns a Pandas DataFrame.
-    """
-    data = []
-    
-    # Regex Explanation:
-    # 1. test_(?P<exp_type>[a-z0-9]+)_input  -> Captures 'k', 'n1', or 'n2' from folder name
-    # 2. /(?P<algo>approx|exact)/            -> Captures algorithm type
-    # 3. n1_(?P<n1>\d+)_n2_(?P<n2>\d+)_k_(?P<k>\d+) -> Captures parameters
-    # 4. :\s+(?P<time>[\d:]+)                -> Captures time string
-    pattern = re.compile(
-        r"test_(?P<exp_type>\w+)_input/"
-        r"(?P<algo>approx|exact)/.*?/"
-        r"test_n1_(?P<n1>\d+)_n2_(?P<n2>\d+)_k_(?P<k>\d+)_\d+\.txt:\s+"
-        r"(?P<time>[\d:]+)"
-    )
+        with open(meta_path) as m:
+            meta = json.load(m)
+        if meta.get('version') != LOG_CACHE_VERSION:
+            return None, None
+        if os.fstat(f.fileno()).st_size < meta['offset']:
+            return None, None
+        if log_fingerprint(f, meta['fingerprint_bytes']) != meta['fingerprint']:
+            return None, None
+        return pd.read_feather(data_path), meta
+    except (OSError, ValueError, KeyError, ImportError):
+        return None, None
 
+def save_log_cache(filename, f, stat, df, offset):
+    data_path, meta_path = cache_paths(filename)
+    try:
+        df.to_feather(data_path)
+    except ImportError:
+        # Feather needs pyarrow; without it the log is simply parsed every time
+        return
+    fingerprint_bytes = min(offset, CACHE_FINGERPRINT_BYTES)
+    meta = {
+        'version': LOG_CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'offset': offset,
+        'fingerprint_bytes': fingerprint_bytes,
+        'fingerprint': log_fingerprint(f, fingerprint_bytes),
+    }
+    with open(meta_path, 'w') as m:
+        json.dump(meta, m)
+
+def parse_log_file(filename, use_cache=True):
+    """
+    Reads the log file in chunks and extracts parameters with a single regex
+    scan per chunk. Returns a Pandas DataFrame.
+    The result is cached next to the log as a Feather file keyed by the log's
+    size and mtime: an unchanged log is loaded straight from the cache, and a
+    log that was appended to only has its new tail parsed.
+    """
     print(f"Reading {filename}...")
-    
-    with open(filename, 'r') as f:
-        for line in f:
-            match = pattern.search(line)
-            if match:
-                entry = match.groupdict()
-                
-                # Convert types
-                row = {
-                    'exp_type': entry['exp_type'], # e.g., 'k', 'n1', 'n2'
-                    'algo': entry['algo'],
-                    'n1': int(entry['n1']),
-                    'n2': int(entry['n2']),
-                    'k': int(entry['k']),
-                    'time_ms': parse_time_to_ms(entry['time'])
-                }
-                data.append(row)
-
-    if not data:
+
+    with open(filename, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        cached, meta = load_log_cache(filename, f) if use_cache else (None, None)
+
+        if cached is not None and (meta['size'], meta['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            # Only a last line without a newline, if any, is left to parse
+            _, _, partial = scan_log(f, meta['offset'])
+            df = cached
+        else:
+            offset = meta['offset'] if cached is not None else 0
+            tail, offset, partial = scan_log(f, offset)
+            df = concat_logs([cached, tail]) if cached is not None else tail
+            if use_cache:
+                save_log_cache(filename, f, stat, df, offset)
+        if not partial.empty:
+            df = concat_logs([df, partial])
+
+    if df.empty:
         print("No valid data found matching the pattern.")
         return pd.DataFrame()
 
-    df = pd.DataFrame(data)
+    return df
+
+def load_results(db_path, run_id=None, git_rev=None, sweeps=False):
+    """
+    Queries the results store for the experiment runs (rows written by my_run).
+    Averaging per configuration happens in SQLite, so only one row per
+    (exp_type, algo, graph_type, n1, n2, k) reaches Pandas however long the
+    history is.
+    With sweeps, reads the run_tests/merge rows instead, which have no
+    experiment: each (algo, graph type) sweep is plotted against the first of
+    n1, n2, k that it varies.
+    """
+    filters = ["status = 'ok'", "n1 IS NOT NULL" if sweeps else "experiment IS NOT NULL"]
+    if sweeps:
+        filters.append("experiment IS NULL")
+    params = []
+    if run_id is not None:
+        filters.append("run_id = ?")
+        params.append(run_id)
+    if git_rev is not None:
+        filters.append("git_rev = ?")
+        params.append(git_rev)
+
+    query = (
+        "SELECT experiment AS exp_type, mode AS algo, graph_type, n1, n2, k, "
+        "AVG(elapsed) * 1000 AS time_ms "
+        "FROM results WHERE " + " AND ".join(filters) + " "
+        "GROUP BY experiment, mode, graph_type, n1, n2, k"
+    )
+
+    print(f"Querying {db_path}...")
+    with sqlite3.connect(db_path) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+
+    if df.empty:
+        print("No sweep results found in the store." if sweeps else
+              "No experiment results found in the store (see --sweeps).")
+    elif sweeps:
+        for _, sweep in df.groupby(['algo', 'graph_type'], dropna=False):
+            varying = [col for col in ['n1', 'n2', 'k'] if sweep[col].nunique() > 1]
+            df.loc[sweep.index, 'exp_type'] = varying[0] if varying else 'n1'
     return df
 
 # ---------------------------------------------------------
 # 2. PLOTTING LOGIC
 # ---------------------------------------------------------
 
-def generate_plots(df):
+# Scenarios drawn per page in the small-multiples layout
+PANELS_PER_PAGE = 12
+FIGSIZE = (10, 6)
+# One figure per worker process, cleared and reused for every plot it draws
+_figures = {}
+
+def algo_style(algo):
+    color = 'blue' if algo == 'approx' else 'red'
+    marker = 'o' if algo == 'approx' else 's'
+    return color, marker
+
+def covaries(data, x_col, col):
+    """True if col changes along x_col, one value per x (e.g. n2 = n1 - 1)."""
+    return data[col].nunique() > 1 and (data.groupby(x_col)[col].nunique() <= 1).all()
+
+def plot_scenarios(df, by_graph_type=False):
     """
-    Groups data and generates plots for each experiment type.
+    Groups data into scenarios: one per experiment type and combination of
+    the two fixed parameters. Returns (x_col, title_suffix, data) tuples in a
+    deterministic order.
+    With by_graph_type, graph types get separate scenarios, and a parameter
+    that covaries with the x-axis (a sweep of n1 = n2) is not held fixed.
     """
-    df_avg = df.groupby(['exp_type', 'algo', 'n1', 'n2', 'k'])['time_ms'].mean().reset_index()
+    keys = ['exp_type', 'graph_type'] if by_graph_type else ['exp_type']
+    df_avg = df.groupby(keys + ['algo', 'n1', 'n2', 'k'], observed=True)['time_ms'].mean().reset_index()
+    df_avg['algo'] = df_avg['algo'].astype(str)
 
+    scenarios = []
     # Get unique experiment types (e.g., 'k', 'n1', 'n2') found in the file
-    experiments = df_avg['exp_type'].unique()
-
-    for exp in experiments:
+    for exp in sorted(df_avg['exp_type'].astype(str).unique()):
         # Filter data for this experiment category
         exp_data = df_avg[df_avg['exp_type'] == exp]
-        
-        # Determine which column is the X-axis
+
+        # The experiment varies one column (the X-axis); the other two are fixed
         x_col = exp  # e.g., 'k', 'n1', or 'n2'
-        
-        # Determine fixed columns (the other two)
         param_cols = {'n1', 'n2', 'k'}
-        fixed_cols = list(param_cols - {x_col})
-        
-        grouped_scenarios = exp_data.groupby(fixed_cols)
+        sweeps = exp_data.groupby('graph_type') if by_graph_type else [(None, exp_data)]
 
-        for fixed_vals, scenario_df in grouped_scenarios:
-            # Create a label for the fixed parameters
-            title_suffix = ", ".join([f"{col}={val}" for col, val in zip(fixed_cols, fixed_vals)])
-            
-            # Iterate through available algorithms to plot them separately
-            unique_algos = scenario_df['algo'].unique()
-            
-            for algo in unique_algos:
-                plt.figure(figsize=(10, 6))
-                
-                # Filter data for specific algorithm
-                algo_data = scenario_df[scenario_df['algo'] == algo].sort_values(by=x_col)
-                
-                # Style settings
-                color = 'blue' if algo == 'approx' else 'red'
-                marker = 'o' if algo == 'approx' else 's'
-                
-                plt.plot(algo_data[x_col], algo_data['time_ms'], marker=marker, label=algo.capitalize(), linestyle='-', color=color)
-
-                plt.title(f"{algo.capitalize()} Avg Execution Time vs {x_col.upper()}\n(Fixed: {title_suffix})")
-                plt.xlabel(f"{x_col} value")
-                plt.ylabel("Time [ms]")
-                plt.legend()
-                plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-                
-                # Save with distinct filename per algorithm
-                filename_safe_title = f"plot_{algo}_var_{x_col}_{title_suffix.replace(', ', '_').replace('=', '')}.png"
-                plt.savefig(os.path.join("fig", filename_safe_title))
-                print(f"Generated plot: {filename_safe_title}")
-                plt.close() # Close to free memory
+        for graph_type, sweep in sweeps:
+            fixed_cols = sorted(param_cols - {x_col})
+            if by_graph_type:
+                fixed_cols = [col for col in fixed_cols if not covaries(sweep, x_col, col)]
+            groups = sweep.groupby(fixed_cols) if fixed_cols else [((), sweep)]
+            for fixed_vals, scenario_df in groups:
+                # Create a label for the fixed parameters
+                labels = [f"{col}={val}" for col, val in zip(fixed_cols, fixed_vals)]
+                title_suffix = ", ".join(([graph_type] if by_graph_type else []) + labels)
+                data = scenario_df[['algo', x_col, 'time_ms']].sort_values(by=['algo', x_col])
+                scenarios.append((x_col, title_suffix, data))
+    return scenarios
+
+def get_figure(figsize):
+    """This process's figure of the given size, cleared for reuse."""
+    fig = _figures.get(figsize)
+    if fig is None:
+        fig = _figures[figsize] = Figure(figsize=figsize)
+    fig.clear()
+    return fig
+
+def draw_scenario(ax, x_col, data, algos):
+    for algo in algos:
+        algo_data = data[data['algo'] == algo]
+        color, marker = algo_style(algo)
+        ax.plot(algo_data[x_col], algo_data['time_ms'], marker=marker, label=algo.capitalize(), linestyle='-', color=color)
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+    ax.legend()
+
+def render_page(page):
+    """
+    Draws one output file. A page is (filename, layout, scenarios): 'separate'
+    and 'combined' pages hold one scenario, 'grid' pages hold several.
+    """
+    filename, layout, scenarios, algos = page
+
+    if layout == 'grid':
+        cols = min(3, len(scenarios))
+        rows = -(-len(scenarios) // cols)
+        fig = get_figure((5 * cols, 3.5 * rows))
+        axes = fig.subplots(rows, cols, squeeze=False).ravel()
+        for ax, (x_col, title_suffix, data) in zip(axes, scenarios):
+            draw_scenario(ax, x_col, data, algos)
+            ax.set_title(f"Fixed: {title_suffix}", fontsize=9)
+            ax.set_xlabel(f"{x_col} value")
+            ax.set_ylabel("Time [ms]")
+        for ax in axes[len(scenarios):]:
+            ax.set_visible(False)
+        fig.suptitle(f"Avg Execution Time vs {scenarios[0][0].upper()}")
+        fig.tight_layout()
+    else:
+        (x_col, title_suffix, data), = scenarios
+        fig = get_figure(FIGSIZE)
+        ax = fig.subplots()
+        draw_scenario(ax, x_col, data, algos)
+        name = " vs ".join(algo.capitalize() for algo in algos)
+        ax.set_title(f"{name} Avg Execution Time vs {x_col.upper()}\n(Fixed: {title_suffix})")
+        ax.set_xlabel(f"{x_col} value")
+        ax.set_ylabel("Time [ms]")
+
+    fig.savefig(filename)
+    return filename
+
+def plot_pages(scenarios, out_dir, layout):
+    """Lays scenarios out into output files according to layout."""
+    pages = []
+    for x_col, title_suffix, data in scenarios:
+        suffix = title_suffix.replace(', ', '_').replace('=', '')
+        algos = list(dict.fromkeys(data['algo']))
+        if layout == 'separate':
+            # Save with distinct filename per algorithm
+            for algo in algos:
+                filename = os.path.join(out_dir, f"plot_{algo}_var_{x_col}_{suffix}.png")
+                pages.append((filename, layout, [(x_col, title_suffix, data)], [algo]))
+        elif layout == 'combined':
+            filename = os.path.join(out_dir, f"plot_var_{x_col}_{suffix}.png")
+            pages.append((filename, layout, [(x_col, title_suffix, data)], algos))
+
+    if layout == 'grid':
+        for x_col in dict.fromkeys(x for x, _, _ in scenarios):
+            group = [scenario for scenario in scenarios if scenario[0] == x_col]
+            algos = sorted(set().union(*(data['algo'] for _, _, data in group)))
+            for page, start in enumerate(range(0, len(group), PANELS_PER_PAGE), 1):
+                filename = os.path.join(out_dir, f"grid_var_{x_col}_p{page:02d}.png")
+                pages.append((filename, layout, group[start:start + PANELS_PER_PAGE], algos))
+    return pages
+
+def generate_plots(df, out_dir="fig", layout='separate', jobs=1, by_graph_type=False):
+    """
+    Groups data and generates plots for each experiment type, rendering the
+    pages on a pool of jobs processes. The files written do not depend on jobs.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    pages = plot_pages(plot_scenarios(df, by_graph_type), out_dir, layout)
+
+    if jobs <= 1:
+        for filename in map(render_page, pages):
+            print(f"Generated plot: {os.path.basename(filename)}")
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunksize = max(1, len(pages) // (jobs * 4))
+        for filename in executor.map(render_page, pages, chunksize=chunksize):
+            print(f"Generated plot: {os.path.basename(filename)}")
 
 # ---------------------------------------------------------
 # 3. MAIN EXECUTION (With Dummy Data Generator)
@@ -141,7 +391,7 @@ def create_dummy_log(filename):
             # Exact takes longer as K grows
             t_exact = 80 + (k * 2) + random.randint(-5, 5) 
             # Approx is faster and constant-ish
-            t_approx = 40 + (k * 0.5) + random.randint(-5, 5)
+            t_approx = 40 + (k // 2) + random.randint(-5, 5)
             
             # Format: H:M:S:ms
             lines.append(f"test_k_input/exact/random/test_n1_{n1:03d}_n2_{n2:03d}_k_{k:03d}_{i:03d}.txt: 0:00:00:{t_exact:03d}")
@@ -151,8 +401,8 @@ def create_dummy_log(filename):
     n2, k = 25, 10
     for n1 in range(50, 550, 50):
         for i in range(1, 11):
-            t_exact = 100 + (n1 * 0.8) + random.randint(-10, 10)
-            t_approx = 50 + (n1 * 0.1) + random.randint(-5, 5)
+            t_exact = 100 + (n1 * 4 // 5) + random.randint(-10, 10)
+            t_approx = 50 + (n1 // 10) + random.randint(-5, 5)
             
             lines.append(f"test_n1_input/exact/random/test_n1_{n1:03d}_n2_{n2:03d}_k_{k:03d}_{i:03d}.txt: 0:00:00:{t_exact:03d}")
             lines.append(f"test_n1_input/approx/random/test_n1_{n1:03d}_n2_{n2:03d}_k_{k:03d}_{i:03d}.txt: 0:00:00:{t_approx:03d}")
@@ -162,19 +412,37 @@ def create_dummy_log(filename):
     print("Dummy log file created.")
 
 if __name__ == "__main__":
-    LOG_FILE = "C:/Users/kegor/Downloads/execution_times.log"
-    
-    # Check if file exists, if not create dummy data
-    if not os.path.exists(LOG_FILE):
-        print(f"'{LOG_FILE}' not found. Creating dummy data for demonstration...")
-        create_dummy_log(LOG_FILE)
-    
-    # 1. Parse
-    df = parse_log_file(LOG_FILE)
-    
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plot execution times")
+    parser.add_argument("log", nargs="?", default=None,
+                        help="Execution log to plot (default: the results store, else execution_times.log)")
+    parser.add_argument("--db", type=str, default=DEFAULT_DB, help="Results store to query")
+    parser.add_argument("--out-dir", type=str, default="fig", help="Directory for the plots")
+    parser.add_argument("--layout", choices=['separate', 'combined', 'grid'], default='separate',
+                        help="One file per algorithm, exact vs approx per scenario, or small-multiples pages")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of rendering processes")
+    parser.add_argument("--sweeps", action="store_true",
+                        help="Plot the store's run_tests.py/merge.py runs per graph type instead of my_run experiments")
+    args = parser.parse_args()
+
+    if args.sweeps and (args.log is not None or not os.path.exists(args.db)):
+        parser.error(f"--sweeps reads the results store ({args.db}), not a log")
+
+    # 1. Load: an explicit log, else the results store, else the default log
+    if args.log is None and os.path.exists(args.db):
+        df = load_results(args.db, sweeps=args.sweeps)
+    else:
+        log_file = args.log or "execution_times.log"
+        # Check if file exists, if not create dummy data
+        if not os.path.exists(log_file):
+            print(f"'{log_file}' not found. Creating dummy data for demonstration...")
+            create_dummy_log(log_file)
+        df = parse_log_file(log_file)
+
     # 2. Plot
     if not df.empty:
-        generate_plots(df)
-        print("Done! Check the directory for .png files.")
+        generate_plots(df, args.out_dir, args.layout, args.jobs, args.sweeps)
+        print(f"Done! Check {args.out_dir} for .png files.")
     else:
-        print("Dataset is empty. Check your log file format.")
\ No newline at end of file
+        print("Dataset is empty. Check your log file format.")
@@ -1,14 +1,30 @@
-import math
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 from generate_graphs import (
-    chain_edge_func,
-    clique_edge_func,
-    default_multi_edge_func,
-    generate_testset,
-    grid_edge_func,
+    COMPRESSIONS,
+    GENERATOR_VERSION,
+    compression_of,
+    generate_file,
+    run_jobs,
+    testset_jobs,
 )
 
 INPUT_DIR = "input"
+MANIFEST_FILE = os.path.join(INPUT_DIR, "manifest.json")
+RECIPE_KEYS = [
+    "n1",
+    "n2",
+    "k",
+    "index",
+    "allow_loops",
+    "graph_type",
+    "clique_size",
+    "grid_width",
+    "seed",
+]
 
 # Test configurations: (n1, n2, k) tuples, always n1 >= n2
 # Exact: n1 = 1..10, Approx: n1 = 100,200,...,1000
@@ -42,45 +58,175 @@ APPROX_CONFIGS = generate_configs(APPROX_N1, APPROX_N2, APPROX_K)
 # GRID_APPROX_CONFIGS = generate_configs(GRID_APPROX_N1, k_values=[2])
 
 
-def generate_for_type(graph_type, edge_func_factory, configs, mode, count):
-    """Generate tests for a specific graph type and mode (exact/approx)."""
+def jobs_for_type(graph_type, configs, mode, count, seed, compress="none"):
+    """Describe the tests for a specific graph type and mode (exact/approx)."""
     output_dir = f"{INPUT_DIR}/{mode}/{graph_type}/"
+    jobs = []
     for n1, n2, k in configs:
-        edge_func = edge_func_factory(max(n1, n2))
-        generate_testset(
-            output_dir=output_dir,
-            count=count,
-            n1=n1,
-            n2=n2,
-            k=k,
-            allow_loops=(graph_type == "random"),
-            edge_func=edge_func,
+        jobs.extend(
+            testset_jobs(
+                output_dir=output_dir,
+                count=count,
+                n1=n1,
+                n2=n2,
+                k=k,
+                allow_loops=(graph_type == "random"),
+                graph_type=graph_type,
+                seed=seed,
+                compress=compress,
+            )
         )
+    return jobs
 
 
-def generate_all(types, count):
+def file_sha256(path):
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_key(filename):
+    return os.path.relpath(filename, INPUT_DIR).replace(os.sep, "/")
+
+
+def job_recipe(job):
+    """Everything that determines the contents of a generated file."""
+    recipe = {key: job[key] for key in RECIPE_KEYS}
+    recipe["generator_version"] = GENERATOR_VERSION
+    return recipe
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE, "r") as f:
+        return json.load(f)["files"]
+
+
+def save_manifest(manifest):
+    os.makedirs(INPUT_DIR, exist_ok=True)
+    tmp_file = MANIFEST_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"files": dict(sorted(manifest.items()))}, f, indent=1)
+    os.replace(tmp_file, MANIFEST_FILE)
+
+
+def is_up_to_date(job, manifest):
+    """A file is skipped when its recipe is unchanged and its size still matches."""
+    entry = manifest.get(manifest_key(job["filename"]))
+    if entry is None or entry["recipe"] != job_recipe(job):
+        return False
+    filename = job["filename"]
+    return os.path.exists(filename) and os.path.getsize(filename) == entry["size"]
+
+
+def other_variants(filename):
+    """The same test's file under the other compressions."""
+    base = filename[: len(filename) - len(COMPRESSIONS[compression_of(filename)])]
+    return [
+        base + suffix for suffix in COMPRESSIONS.values() if base + suffix != filename
+    ]
+
+
+def drop_other_variants(jobs, manifest):
+    """
+    Delete files of these tests written with another compression, so that
+    switching --compress does not leave the runner two copies of a test.
+    """
+    for job in jobs:
+        for variant in other_variants(job["filename"]):
+            if os.path.exists(variant):
+                os.remove(variant)
+            manifest.pop(manifest_key(variant), None)
+
+
+def generate_and_hash(job):
+    """Worker for run_jobs: generate a file and return its manifest entry."""
+    generate_file(job)
+    return {
+        "recipe": job_recipe(job),
+        "size": os.path.getsize(job["filename"]),
+        "sha256": file_sha256(job["filename"]),
+    }
+
+
+def generate_all(types, count, seed=0, n_jobs=1, force=False, compress="none"):
     """Generate tests for all specified types in both exact and approx modes."""
 
     type_configs = {
-        "random": (lambda n: default_multi_edge_func, EXACT_CONFIGS, APPROX_CONFIGS),
-        "chain": (lambda n: chain_edge_func, EXACT_CONFIGS, APPROX_CONFIGS),
-        "clique": (lambda n: clique_edge_func(n), EXACT_CONFIGS, APPROX_CONFIGS),
-        # "grid": (lambda n: grid_edge_func(int(math.sqrt(n))), GRID_EXACT_CONFIGS, GRID_APPROX_CONFIGS),
+        "random": (EXACT_CONFIGS, APPROX_CONFIGS),
+        "chain": (EXACT_CONFIGS, APPROX_CONFIGS),
+        "clique": (EXACT_CONFIGS, APPROX_CONFIGS),
+        # "grid": (GRID_EXACT_CONFIGS, GRID_APPROX_CONFIGS),
     }
 
+    jobs = []
     for graph_type in types:
         if graph_type not in type_configs:
             continue
 
-        edge_func_factory, exact_configs, approx_configs = type_configs[graph_type]
+        exact_configs, approx_configs = type_configs[graph_type]
+        jobs.extend(
+            jobs_for_type(graph_type, exact_configs, "exact", count, seed, compress)
+        )
+        jobs.extend(
+            jobs_for_type(graph_type, approx_configs, "approx", count, seed, compress)
+        )
 
-        print(f"\n=== Generating {graph_type.upper()} exact tests ===")
-        generate_for_type(graph_type, edge_func_factory, exact_configs, "exact", count)
+    manifest = load_manifest()
+    drop_other_variants(jobs, manifest)
+    pending = [job for job in jobs if force or not is_up_to_date(job, manifest)]
 
-        print(f"\n=== Generating {graph_type.upper()} approx tests ===")
-        generate_for_type(
-            graph_type, edge_func_factory, approx_configs, "approx", count
-        )
+    print(
+        f"\n=== Generating {len(pending)} tests with {n_jobs} job(s) "
+        f"({len(jobs) - len(pending)} unchanged) ==="
+    )
+    entries = run_jobs(pending, n_jobs, worker=generate_and_hash)
+
+    for job, entry in zip(pending, entries):
+        manifest[manifest_key(job["filename"])] = entry
+    save_manifest(manifest)
+
+
+def verify_corpus(n_jobs=1):
+    """
+    Re-hash every file in the manifest and report missing or corrupted ones.
+    Bad entries are dropped from the manifest so the next run regenerates them.
+    """
+    manifest = load_manifest()
+    keys = sorted(manifest)
+    paths = [os.path.join(INPUT_DIR, key) for key in keys]
+
+    def digest(path):
+        return file_sha256(path) if os.path.exists(path) else None
+
+    if n_jobs <= 1:
+        digests = list(map(digest, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            existing = [path for path in paths if os.path.exists(path)]
+            hashed = dict(zip(existing, executor.map(file_sha256, existing)))
+        digests = [hashed.get(path) for path in paths]
+
+    bad = []
+    for key, actual in zip(keys, digests):
+        if actual is None:
+            print(f"MISSING: {key}")
+            bad.append(key)
+        elif actual != manifest[key]["sha256"]:
+            print(f"CORRUPTED: {key}")
+            bad.append(key)
+
+    for key in bad:
+        del manifest[key]
+    if bad:
+        save_manifest(manifest)
+
+    print(f"\nVerified {len(keys)} files, {len(bad)} bad")
+    return not bad
 
 
 if __name__ == "__main__":
@@ -98,11 +244,41 @@ if __name__ == "__main__":
         default=["all"],
         help="Graph types to generate",
     )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Global seed for per-file seeding"
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Regenerate files even if unchanged"
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSIONS),
+        default="none",
+        help="Write inputs compressed (.txt.gz, or .txt.zst with zstandard); "
+        "files of the same tests in another format are replaced",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Re-hash files listed in the manifest instead of generating",
+    )
 
     args = parser.parse_args()
 
+    if args.verify:
+        exit(0 if verify_corpus(args.jobs) else 1)
+
     types = args.types
     if "all" in types:
         types = ["random", "chain", "clique"]
 
-    generate_all(types, args.count)
+    if args.compress == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error("--compress zstd needs the zstandard package")
+
+    generate_all(types, args.count, args.seed, args.jobs, args.force, args.compress)
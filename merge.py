@@ -0,0 +1,138 @@
+"""Merge the journals of sharded run_tests.py sweeps into one result set."""
+
+import glob
+import os
+import sys
+from collections import defaultdict
+
+from results_store import DEFAULT_DB, ResultsStore, connect, name_run
+from run_tests import (
+    JOURNAL_DIR,
+    RED,
+    RESET,
+    format_shard,
+    print_stats,
+    read_journal,
+    run_from_row,
+)
+
+GREEN = "\033[92m"
+
+
+def merge_journals(paths):
+    """
+    Combine journals into {(mode, input): rows}. Returns the tests and the
+    problems found: shards missing from the set or given twice, shard counts
+    that disagree, and tests in more than one journal (the later one wins).
+    """
+    tests = {}
+    shards = defaultdict(list)
+    problems = []
+    for path in paths:
+        header, done, _ = read_journal(path)
+        if header is None:
+            problems.append(f"{path} is empty")
+            continue
+        if header["shard"] is not None:
+            shards[tuple(header["shard"])].append(path)
+        for test, rows in done.items():
+            if test in tests:
+                problems.append(f"{test[1]} ({test[0]}) is in more than one journal")
+            tests[test] = rows
+
+    counts = sorted({count for _, count in shards})
+    if len(counts) > 1:
+        problems.append(
+            f"journals split the inputs into {', '.join(map(str, counts))} shards"
+        )
+    elif counts:
+        missing = [
+            (i, counts[0]) for i in range(counts[0]) if (i, counts[0]) not in shards
+        ]
+        if missing:
+            problems.append(
+                f"missing shards {', '.join(format_shard(s) for s in missing)}"
+            )
+    for shard, shard_paths in sorted(shards.items()):
+        if len(shard_paths) > 1:
+            problems.append(
+                f"shard {format_shard(shard)} is in {', '.join(shard_paths)}"
+            )
+    return tests, problems
+
+
+def merged_results(tests):
+    """{(mode, graph type): {(n1, n2, k): [Run]}} of the merged tests."""
+    results = defaultdict(lambda: defaultdict(list))
+    for rows in tests.values():
+        for row in rows:
+            key = (row["n1"], row["n2"], row["k"])
+            results[(row["mode"], row["graph_type"])][key].append(run_from_row(row))
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Merge shard journals into one result set"
+    )
+    parser.add_argument(
+        "journals",
+        nargs="*",
+        help=f"Journals to merge (default: {JOURNAL_DIR}/*.jsonl)",
+    )
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=DEFAULT_DB,
+        help="Results store to add the merged runs to, as one run",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Only report the merged results",
+    )
+    parser.add_argument(
+        "--name",
+        type=str,
+        default=None,
+        help="Name the merged run (e.g. a baseline for compare.py)",
+    )
+    args = parser.parse_args()
+
+    paths = args.journals or sorted(glob.glob(os.path.join(JOURNAL_DIR, "*.jsonl")))
+    if not paths:
+        parser.error(f"no journals given or found in {JOURNAL_DIR}/")
+
+    tests, problems = merge_journals(paths)
+    results = merged_results(tests)
+    for (mode, graph_type), by_size in sorted(results.items()):
+        print_stats(by_size, f"{str(graph_type).upper()} ({mode})")
+
+    failed = sum(not rows for rows in tests.values())
+    print("\n" + "=" * 50)
+    print(
+        f"Merged {len(tests)} tests from {len(paths)} journals ({failed} without runs)"
+    )
+
+    if not args.no_store:
+        store = ResultsStore(args.db)
+        run_id = store.meta["run_id"]
+        store.record(
+            [{**row, "run_id": run_id} for rows in tests.values() for row in rows]
+        )
+        print(f"Recorded in {args.db} as run {run_id}")
+        if args.name:
+            conn = connect(args.db)
+            try:
+                name_run(conn, args.name, run_id)
+            finally:
+                conn.close()
+            print(f"Run saved as '{args.name}'")
+
+    for problem in problems:
+        print(f"{RED}{problem}{RESET}")
+    if problems:
+        sys.exit(1)
+    print(f"{GREEN}Journals merged without conflicts{RESET}")
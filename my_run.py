@@ -1,8 +1,13 @@
 import os
+import re
 import subprocess
 import time
 from datetime import datetime, timedelta
 
+from cost_model import CostModel
+from results_store import DEFAULT_DB, ResultsStore, binary_hash
+from run_tests import parse_n1_n2_k, parse_phases
+
 # --- CONFIGURATION ---
 # Path to your executable (using raw string r"" for Windows paths)
 EXE_PATH = r".\Grafy TAiO\bin\Release\net8.0\Grafy TAiO.exe"
@@ -11,6 +16,9 @@ EXE_PATH = r".\Grafy TAiO\bin\Release\net8.0\Grafy TAiO.exe"
 INPUT_ROOT = r".\complexity_tests"
 OUTPUT_ROOT = r".\complexity_tests_results"
 LOG_FILE = "execution_times.log"
+RESULTS_DB = DEFAULT_DB
+# Longest a single test may run (seconds); shorter timeouts come from the cost model
+TIMEOUT = 900
 
 def format_duration(td):
     """
@@ -25,12 +33,40 @@ def format_duration(td):
     
     return f"{hours}:{minutes:02d}:{seconds:02d}:{milliseconds:03d}"
 
+def result_row(rel_path, path_parts, status, duration=None, phases=None):
+    """
+    Builds a results store row for a test, e.g. test_k_input/approx/random/x.txt
+    is experiment 'k', mode 'approx', graph type 'random'. phases are the
+    solver's own per-phase times, if it reported them.
+    """
+    n1, n2, k = parse_n1_n2_k(rel_path)
+    experiment = re.match(r"test_(\w+)_input$", path_parts[0])
+    row = {
+        'mode': "approx" if "approx" in path_parts else "exact",
+        'graph_type': path_parts[-2] if len(path_parts) > 1 else None,
+        'experiment': experiment.group(1) if experiment else None,
+        'input': rel_path.replace("\\", "/"),
+        'n1': n1,
+        'n2': n2,
+        'k': k,
+        'status': status,
+        'elapsed': duration.total_seconds() if duration is not None else None,
+    }
+    if phases is not None:
+        row.update(phases._asdict())
+    return row
+
 def main():
     # Create the log file (or clear it if it exists)
     with open(LOG_FILE, 'w', encoding='utf-8') as f:
         f.write(f"Execution Log - Started at {datetime.now()}\n")
         f.write("-" * 50 + "\n")
 
+    # Every run is also appended to the shared results store
+    store = ResultsStore(RESULTS_DB, binary_hash(os.path.dirname(EXE_PATH)))
+    # Predicted run times from previous runs: skip hopeless tests, tighten timeouts
+    model = CostModel.calibrate(RESULTS_DB, store.meta['binary_hash'])
+
     print(f"Starting tests...")
     print(f"Input: {INPUT_ROOT}")
     print(f"Output: {OUTPUT_ROOT}")
@@ -66,14 +102,23 @@ def main():
             cmd.append(input_full_path)
             cmd.append(output_full_path)
 
+            n1, n2, k = parse_n1_n2_k(input_full_path)
+            mode = "approx" if "approx" in path_parts else "exact"
+            predicted = model.predict(mode, n1, n2, k) if n1 is not None else None
+            if predicted is not None and predicted > TIMEOUT:
+                print(f"Skipping: {rel_path} (predicted {predicted:.0f}s)")
+                with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                    f.write(f"{rel_path}: skipped: predicted {predicted:.0f}s\n")
+                continue
+
             print(f"Running: {rel_path}...")
 
             # Measure execution time
             start_time = datetime.now()
             
             try:
-                # Run the subprocess
-                subprocess.run(cmd, check=True, capture_output=True, timeout=900)
+                # Run the subprocess; its stdout (the whole graph and every copy) is discarded
+                completed = subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=model.timeout(predicted, TIMEOUT))
                 
                 end_time = datetime.now()
                 duration = end_time - start_time
@@ -87,15 +132,19 @@ def main():
                 # Append to log file immediately
                 with open(LOG_FILE, 'a', encoding='utf-8') as f:
                     f.write(log_line + "\n")
+                # The solver reports its read/solve/format/write times on stderr
+                phases = parse_phases(completed.stderr.decode(errors="replace"))
+                store.record([result_row(rel_path, path_parts, "ok", duration, phases)])
 
             except subprocess.CalledProcessError as e:
                 print(f"Error running {filename}: {e}")
                 with open(LOG_FILE, 'a', encoding='utf-8') as f:
                     f.write(f"{rel_path}: ERROR\n")
+                store.record([result_row(rel_path, path_parts, "error")])
             except Exception as e:
                 print(f"Unexpected error: {e}")
 
-    print("\nProcessing complete. Check execution_times.log.")
+    print(f"\nProcessing complete. Check execution_times.log and {RESULTS_DB}.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""Append-only SQLite store of test results shared by the runners and plots."""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import subprocess
+import time
+import uuid
+
+DEFAULT_DB = "results.db"
+SOLVER_DIR = "Grafy TAiO"
+# Each mode's own solver source; all other sources of the project are shared
+MODE_SOURCES = {"exact": "ExactSolver.cs", "approx": "ApproximateSolver.cs"}
+# Seconds a writer waits for another writer's transaction before failing
+BUSY_TIMEOUT = 60
+
+COLUMNS = (
+    "run_id",
+    "recorded_at",
+    "git_rev",
+    "binary_hash",
+    "host",
+    "mode",
+    "graph_type",
+    "experiment",
+    "input",
+    "input_hash",
+    "options",
+    "n1",
+    "n2",
+    "k",
+    "repetition",
+    "status",
+    "elapsed",
+    "user_time",
+    "sys_time",
+    "max_rss_kb",
+    "major_faults",
+    "minor_faults",
+    "voluntary_switches",
+    "involuntary_switches",
+    "read_time",
+    "solve_time",
+    "format_time",
+    "write_time",
+    "output_bytes",
+    "solver_hash",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    git_rev TEXT,
+    binary_hash TEXT,
+    host TEXT,
+    mode TEXT NOT NULL,
+    graph_type TEXT,
+    experiment TEXT,
+    input TEXT,
+    input_hash TEXT,
+    options TEXT,
+    n1 INTEGER,
+    n2 INTEGER,
+    k INTEGER,
+    repetition INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'ok',
+    elapsed REAL,
+    user_time REAL,
+    sys_time REAL,
+    max_rss_kb INTEGER,
+    major_faults INTEGER,
+    minor_faults INTEGER,
+    voluntary_switches INTEGER,
+    involuntary_switches INTEGER,
+    read_time REAL,
+    solve_time REAL,
+    format_time REAL,
+    write_time REAL,
+    output_bytes INTEGER,
+    solver_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_size ON results (mode, graph_type, n1, n2, k);
+CREATE INDEX IF NOT EXISTS results_experiment ON results (experiment, mode);
+CREATE INDEX IF NOT EXISTS results_revision ON results (git_rev, binary_hash);
+CREATE TABLE IF NOT EXISTS input_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_names (
+    name TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    named_at REAL NOT NULL
+);
+"""
+# Columns added after the first schema, with the indexes that use them
+MIGRATIONS = {
+    "input_hash": "TEXT",
+    "options": "TEXT",
+    "read_time": "REAL",
+    "solve_time": "REAL",
+    "format_time": "REAL",
+    "write_time": "REAL",
+    "output_bytes": "INTEGER",
+    "solver_hash": "TEXT",
+}
+POST_MIGRATION = """
+CREATE INDEX IF NOT EXISTS results_cache
+    ON results (input_hash, binary_hash, mode, options, status);
+CREATE INDEX IF NOT EXISTS results_solver_cache
+    ON results (input_hash, solver_hash, mode, options, status);
+"""
+
+
+def connect(path=DEFAULT_DB):
+    """
+    Open a store set up by setup(). Writers from parallel workers queue on
+    the lock for up to BUSY_TIMEOUT seconds.
+    """
+    return sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+
+
+def setup(path=DEFAULT_DB):
+    """
+    Create the store or migrate an older one, once per process that writes
+    to it. WAL journaling (kept by the file) lets readers run alongside a
+    writer. The schema and migrations run in one BEGIN IMMEDIATE
+    transaction that reads the columns inside it, so processes opening an
+    older store at the same time do not add a column twice.
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+            for column, kind in MIGRATIONS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {column} {kind}")
+            for statement in POST_MIGRATION.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def name_run(conn, name, run_id):
+    """Give a run a name (e.g. a baseline), replacing any run of that name."""
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO run_names VALUES (?, ?, ?)",
+            (name, run_id, time.time()),
+        )
+
+
+def resolve_run(conn, ref):
+    """
+    Run id for a run name, a run id or unique prefix of one, or 'latest'.
+    Raises KeyError if nothing matches.
+    """
+    if ref == "latest":
+        row = conn.execute(
+            "SELECT run_id FROM results ORDER BY recorded_at DESC LIMIT 1"
+        ).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT run_id FROM run_names WHERE name = ?", (ref,)
+        ).fetchone()
+        if row is None:
+            ids = conn.execute(
+                "SELECT DISTINCT run_id FROM results WHERE run_id LIKE ?",
+                (ref + "%",),
+            ).fetchall()
+            row = ids[0] if len(ids) == 1 else None
+    if row is None:
+        raise KeyError(f"no run matches '{ref}'")
+    return row[0]
+
+
+def git_revision():
+    """Current commit of the working tree, with a -dirty suffix if modified."""
+    try:
+        rev = subprocess.run(
+            ["git", "describe", "--always", "--dirty", "--abbrev=12"],
+            capture_output=True,
+            text=True,
+        )
+    except FileNotFoundError:
+        return None
+    return rev.stdout.strip() or None
+
+
+def _hash_file(h, path):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+
+def binary_hash(path):
+    """
+    SHA-256 over a solver binary, or over every file of a directory (a
+    published solver is the apphost plus its assemblies).
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    files = [path]
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    h = hashlib.sha256()
+    for name in files:
+        h.update(os.path.relpath(name, path).encode())
+        _hash_file(h, name)
+    return h.hexdigest()
+
+
+def solver_hash(mode, project_dir=SOLVER_DIR):
+    """
+    SHA-256 over the solver sources a mode's results depend on: its own
+    solver and every shared source (.cs and .csproj files), but not the other
+    mode's solver, so changing one solver keeps the other mode's results.
+    """
+    if not os.path.isdir(project_dir):
+        return None
+    others = {name for m, name in MODE_SOURCES.items() if m != mode}
+    files = []
+    for root, dirs, names in os.walk(project_dir):
+        dirs[:] = sorted(d for d in dirs if d not in ("bin", "obj"))
+        files.extend(
+            os.path.join(root, name)
+            for name in names
+            if name.endswith((".cs", ".csproj")) and name not in others
+        )
+    h = hashlib.sha256(mode.encode())
+    for name in sorted(files):
+        h.update(os.path.relpath(name, project_dir).encode())
+        _hash_file(h, name)
+    return h.hexdigest()
+
+
+class ResultsStore:
+    """A run's handle on the store: stamps every row with the run metadata."""
+
+    def __init__(
+        self, path=DEFAULT_DB, binary_hash=None, options=None, solver_hashes=None
+    ):
+        self.path = path
+        # Per-mode source hashes (see solver_hash) keying the result cache;
+        # without them the cache is keyed by binary_hash for both modes
+        self.solver_hashes = solver_hashes or {}
+        self.meta = {
+            "run_id": uuid.uuid4().hex,
+            "git_rev": git_revision(),
+            "binary_hash": binary_hash,
+            "host": socket.gethostname(),
+            "options": options,
+        }
+        setup(path)
+
+    def input_hash(self, path):
+        """
+        SHA-256 of an input file, remembered by (size, mtime) so unchanged
+        inputs are not re-read on every run.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        conn = connect(self.path)
+        try:
+            row = conn.execute(
+                "SELECT sha256 FROM input_hashes WHERE path = ? AND size = ? "
+                "AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+            if row:
+                return row[0]
+            h = hashlib.sha256()
+            _hash_file(h, path)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO input_hashes VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, h.hexdigest()),
+                )
+            return h.hexdigest()
+        finally:
+            conn.close()
+
+    def cached(self, input_hash, mode):
+        """
+        Rows of the latest run that measured this input with the same solver
+        (the mode's solver_hash, else the binary), mode and runner options,
+        or [] if there is none.
+        """
+        column, solver = "solver_hash", self.solver_hashes.get(mode)
+        if solver is None:
+            column, solver = "binary_hash", self.meta["binary_hash"]
+        if solver is None:
+            return []
+        key = (input_hash, solver, mode, self.meta["options"])
+        conn = connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            latest = conn.execute(
+                "SELECT run_id, input FROM results WHERE input_hash = ? "
+                f"AND {column} = ? AND mode = ? AND options IS ? AND status = 'ok' "
+                "ORDER BY recorded_at DESC LIMIT 1",
+                key,
+            ).fetchone()
+            if latest is None:
+                return []
+            rows = conn.execute(
+                "SELECT * FROM results WHERE run_id = ? AND input = ? AND mode = ? "
+                "AND status = 'ok' ORDER BY repetition",
+                (latest["run_id"], latest["input"], mode),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def record(self, rows):
+        """
+        Append rows (dicts keyed by COLUMNS) in one transaction. Safe to call
+        from several threads or processes at once; each call uses its own
+        connection.
+        """
+        defaults = {**self.meta, "recorded_at": time.time()}
+        defaults.update(repetition=0, status="ok")
+        values = [tuple({**defaults, **row}.get(c) for c in COLUMNS) for row in rows]
+        if not values:
+            return
+        conn = connect(self.path)
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    f"INSERT INTO results ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    values,
+                )
+        finally:
+            conn.close()
@@ -1,32 +1,320 @@
 """Simple test runner for graph algorithm benchmarking."""
 
+import asyncio
 import atexit
+import json
+import math
 import os
+import random
 import re
+import shutil
+import signal
+import statistics
 import subprocess
 import sys
+import tempfile
+import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 from pathlib import Path
+from typing import NamedTuple, Optional
+
+from cost_model import CostModel, log_work
+from generate_graphs import COMPRESSIONS, compression_of, open_input
+from results_store import (
+    COLUMNS,
+    DEFAULT_DB,
+    ResultsStore,
+    binary_hash,
+    connect,
+    name_run,
+    solver_hash,
+)
 
 # ANSI color codes
 RED = "\033[91m"
+YELLOW = "\033[93m"
 RESET = "\033[0m"
 
 INPUT_DIR = "input"
 OUTPUT_DIR = "output"
 CONTAINER_NAME = "taio-test-runner"
+PROJECT_DIR = "Grafy TAiO"
+BUILD_DIR = "build/solver"
+# Smallest valid input: G and H with one vertex each, k = 1
+TRIVIAL_INPUT = "1\n0\n1\n0\n1"
+# Cores kept free for the runner and the OS in timing-quality mode
+RESERVED_CPUS = 1
+# Exit code of the in-container batch driver after a test times out
+BATCH_TIMEOUT_EXIT = 3
+# Longest a single test may run (seconds); per-test timeouts are predicted below it
+DEFAULT_TIMEOUT = 300
+# Bootstrap resamples for confidence intervals (fewer for early-stop checks)
+BOOTSTRAP_RESAMPLES = 2000
+EARLY_STOP_RESAMPLES = 200
+# Bytes of a test's stdout/stderr kept from its start and its end for diagnostics
+OUTPUT_HEAD = 4096
+OUTPUT_TAIL = 16384
+# Phases the solver times itself, reported as "TIMING <phase> <ns>" lines
+PHASES = ("read", "solve", "format", "write")
+TIMING_PATTERN = re.compile(r"^TIMING (\w+) (\d+)$", re.MULTILINE)
+# Size of the report, printed by the solver after its phase times
+OUTPUT_PATTERN = re.compile(r"^OUTPUT (\d+)$", re.MULTILINE)
+# Where solver reports go; see OutputSink
+OUTPUT_SINKS = ("file", "null", "tmpfs", "summary", "zstd")
+# RAM-backed directory the tmpfs sink stages reports in, and compressed inputs
+# are decompressed into
+TMPFS_DIR = "/dev/shm"
+# Report lines the summary sink keeps: k, the edit count and each copy's mapping
+SUMMARY_PATTERN = re.compile(
+    rb"^(?:And given the number of copies|Solution \(the extended G\) found|G:).*\n",
+    re.MULTILINE,
+)
+ZSTD_LEVEL = 3
+# Largest read from a test's output pipes
+READ_CHUNK = 1 << 16
+# Chunk size when decompressing an input into staging
+STAGE_CHUNK = 1 << 20
+# Seconds between redraws of the progress line
+PROGRESS_INTERVAL = 1.0
+JOURNAL_DIR = "journal"
+# Work (see cost_model.log_work) past which a test runs into any sensible
+# timeout; heavier tests weigh the same when inputs are split into shards
+SHARD_WORK_CAP = 1e12
 _container_started = False
+_staging_dir = None
+_solver_command = None
+_progress = None
 
 
-def start_docker_container():
-    """Start a persistent Docker container for running tests."""
-    global _container_started
+class Benchmark(NamedTuple):
+    """Repetition policy for each input."""
+
+    warmup: int = 0  # unmeasured runs before measuring
+    repeat: int = 1  # maximum measured runs
+    min_repeat: int = 3  # measured runs before early stopping is considered
+    ci_target: float = 0.0  # stop once the CI half-width is below this fraction
+
+
+class Usage(NamedTuple):
+    """Resources used by one solver process, from its rusage."""
+
+    max_rss_kb: int
+    user_time: float
+    sys_time: float
+    major_faults: int
+    minor_faults: int
+    voluntary_switches: int
+    involuntary_switches: int
+
+    @classmethod
+    def from_rusage(cls, ru):
+        return cls(
+            ru.ru_maxrss,
+            ru.ru_utime,
+            ru.ru_stime,
+            ru.ru_majflt,
+            ru.ru_minflt,
+            ru.ru_nvcsw,
+            ru.ru_nivcsw,
+        )
+
+
+class Phases(NamedTuple):
+    """Seconds one run spent in each phase, as reported by the solver."""
+
+    read_time: float
+    solve_time: float
+    format_time: float
+    write_time: float
+
+    @classmethod
+    def from_ns(cls, ns):
+        """From {phase: nanoseconds}, or None unless every phase is there."""
+        if not all(phase in ns for phase in PHASES):
+            return None
+        return cls(*(ns[phase] / 1e9 for phase in PHASES))
+
+
+class Run(NamedTuple):
+    """
+    One measured run: wall time in seconds and, when known, resource usage,
+    the solver's own per-phase times and the size of its report.
+    """
+
+    elapsed: float
+    usage: Optional[Usage] = None
+    phases: Optional[Phases] = None
+    output_bytes: Optional[int] = None
+
+
+class SummaryWriter:
+    """Keeps only the summary lines (see SUMMARY_PATTERN) of a streamed report."""
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.partial = b""
+
+    def feed(self, chunk):
+        data = self.partial + chunk
+        cut = data.rfind(b"\n") + 1
+        self.file.writelines(SUMMARY_PATTERN.findall(data, 0, cut))
+        self.partial = data[cut:]
+
+    def close(self):
+        self.file.writelines(SUMMARY_PATTERN.findall(self.partial + b"\n"))
+        self.file.close()
+
+
+class ZstdWriter:
+    """Compresses a streamed report into a .zst file as it arrives."""
+
+    def __init__(self, path):
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        self.writer = compressor.stream_writer(open(path, "wb"))
+
+    def feed(self, chunk):
+        self.writer.write(chunk)
+
+    def close(self):
+        self.writer.close()
+
+
+class InputStaging:
+    """
+    Compressed inputs (.txt.gz, .txt.zst) are decompressed into a RAM-backed
+    directory just before their test runs and deleted after it; plain inputs
+    are used in place. prefetch starts decompressing an input in a thread, so
+    the next test's input is ready by the time the current test finishes.
+    """
+
+    def __init__(self):
+        root = TMPFS_DIR if os.path.isdir(TMPFS_DIR) else None
+        self.directory = tempfile.mkdtemp(prefix="taio-input-", dir=root)
+        atexit.register(shutil.rmtree, self.directory, True)
+        self.pending = {}
+
+    def staged(self, input_file):
+        rel = Path(os.path.relpath(input_file, INPUT_DIR))
+        return Path(self.directory) / rel.parent / input_name(input_file)
+
+    def decompress(self, input_file):
+        staged = self.staged(input_file)
+        os.makedirs(staged.parent, exist_ok=True)
+        partial = staged.with_name(staged.name + ".part")
+        with open_input(input_file) as src, open(partial, "wb") as dst:
+            shutil.copyfileobj(src, dst, STAGE_CHUNK)
+        os.replace(partial, staged)
+        return staged
+
+    def prefetch(self, input_file):
+        """Start decompressing input_file, if compressed, in the background."""
+        if compression_of(input_file) != "none" and input_file not in self.pending:
+            self.pending[input_file] = asyncio.ensure_future(
+                asyncio.to_thread(self.decompress, input_file)
+            )
+
+    async def fetch(self, input_file):
+        """The path to run a test on: its input, or the decompressed copy."""
+        if compression_of(input_file) == "none":
+            return input_file
+        self.prefetch(input_file)
+        return await self.pending[input_file]
+
+    def release(self, input_file):
+        if self.pending.pop(input_file, None) is not None:
+            self.staged(input_file).unlink(missing_ok=True)
+
+
+class OutputSink:
+    """
+    Where solver reports go:
+      file     written to output/ as usual
+      null     written to /dev/null
+      tmpfs    written to RAM, moved to output/ only if verification fails
+      summary  streamed back on the solver's stdout; only k, the edit count
+               and the mappings are kept, in *_out.summary.txt
+      zstd     streamed back on the solver's stdout and compressed into
+               *_out.txt.zst
+    """
+
+    STREAMED = ("summary", "zstd")
+
+    def __init__(self, kind="file"):
+        self.kind = kind
+        self.staging = None
+        if kind == "tmpfs":
+            root = TMPFS_DIR
+            if not os.path.isdir(TMPFS_DIR):
+                warn(
+                    f"{TMPFS_DIR} not found, staging reports in the temporary "
+                    "directory, which may not be in RAM"
+                )
+                root = None
+            self.staging = tempfile.mkdtemp(prefix="taio-output-", dir=root)
+            atexit.register(shutil.rmtree, self.staging, True)
+
+    def staged(self, output_file):
+        return Path(self.staging) / os.path.relpath(output_file, OUTPUT_DIR)
+
+    def destination(self, output_file, use_docker=False):
+        """The path the solver is given to write a test's report to."""
+        if self.kind == "null":
+            return os.devnull
+        if self.kind in self.STREAMED:
+            return "/dev/stdout"
+        if self.kind == "tmpfs":
+            staged = self.staged(output_file)
+            os.makedirs(staged.parent, exist_ok=True)
+            return str(staged)
+        if use_docker:
+            return container_paths(output_file, output_file)[1]
+        return str(output_file)
+
+    def stream(self, output_file):
+        """A writer for a report streamed on the solver's stdout, or None."""
+        if self.kind == "summary":
+            return SummaryWriter(output_file.with_suffix(".summary.txt"))
+        if self.kind == "zstd":
+            return ZstdWriter(f"{output_file}.zst")
+        return None
+
+    def settle(self, input_file, output_file):
+        """After a test's runs, keep a staged report only if it fails verification."""
+        if self.kind != "tmpfs":
+            return
+        staged = self.staged(output_file)
+        if not staged.exists():
+            return
+        from verify_outputs import verify
+
+        problems = verify(input_file, staged)
+        if problems:
+            shutil.move(staged, output_file)
+            log(
+                f"{RED}  VERIFY FAILED: {input_file.name} - {problems[0]} "
+                f"(kept {output_file}){RESET}"
+            )
+        else:
+            staged.unlink()
+
+
+def start_docker_container(staging_dir=None):
+    """
+    Start a persistent Docker container for running tests, with staging_dir
+    (decompressed inputs, see InputStaging) mounted read-only if given.
+    """
+    global _container_started, _staging_dir
     if _container_started:
         return True
     subprocess.run(["docker", "rm", "-f", CONTAINER_NAME], capture_output=True)
     input_abs, output_abs = os.path.abspath(INPUT_DIR), os.path.abspath(OUTPUT_DIR)
     os.makedirs(output_abs, exist_ok=True)
+    mounts = ["-v", f"{input_abs}:/app/input:ro", "-v", f"{output_abs}:/app/output"]
+    if staging_dir is not None:
+        mounts.extend(["-v", f"{os.path.abspath(staging_dir)}:/app/staging:ro"])
     result = subprocess.run(
         [
             "docker",
@@ -34,10 +322,7 @@ def start_docker_container():
             "-d",
             "--name",
             CONTAINER_NAME,
-            "-v",
-            f"{input_abs}:/app/input:ro",
-            "-v",
-            f"{output_abs}:/app/output",
+            *mounts,
             "--entrypoint",
             "tail",
             "grafy-taio:latest",
@@ -51,11 +336,22 @@ def start_docker_container():
         print(f"{RED}Failed to start Docker container: {result.stderr}{RESET}")
         return False
     _container_started = True
+    _staging_dir = staging_dir
     atexit.register(stop_docker_container)
     print("Docker container started.")
     return True
 
 
+def container_image():
+    """Image ID the test container runs, identifying the solver build in it."""
+    result = subprocess.run(
+        ["docker", "inspect", "--format", "{{.Image}}", CONTAINER_NAME],
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
 def stop_docker_container():
     """Stop and remove the Docker container."""
     global _container_started
@@ -65,6 +361,105 @@ def stop_docker_container():
         print("\nDocker container stopped.")
 
 
+def find_solver(build_dir):
+    """Return the command that runs the published solver in build_dir."""
+    runtime_configs = sorted(Path(build_dir).glob("*.runtimeconfig.json"))
+    if not runtime_configs:
+        return None
+    name = runtime_configs[0].name[: -len(".runtimeconfig.json")]
+    for apphost in (Path(build_dir) / name, Path(build_dir) / f"{name}.exe"):
+        if apphost.is_file() and os.access(apphost, os.X_OK):
+            return [str(apphost.resolve())]
+    return ["dotnet", str((Path(build_dir) / f"{name}.dll").resolve())]
+
+
+def build_solver():
+    """Publish the solver once in Release mode so tests can exec it directly."""
+    global _solver_command
+    if _solver_command is not None:
+        return True
+    projects = sorted(Path(PROJECT_DIR).glob("*.csproj"))
+    if not projects:
+        print(f"{RED}No .csproj found in {PROJECT_DIR}/{RESET}")
+        return False
+
+    print(f"Building {projects[0]} (Release)...")
+    try:
+        result = subprocess.run(
+            ["dotnet", "publish", str(projects[0]), "-c", "Release", "-o", BUILD_DIR],
+            capture_output=True,
+            text=True,
+        )
+    except FileNotFoundError as e:
+        print(f"{RED}Failed to build solver - Command not found: {e}{RESET}")
+        return False
+    if result.returncode != 0:
+        print(f"{RED}Failed to build solver:\n{result.stdout[-2000:]}{RESET}")
+        return False
+
+    _solver_command = find_solver(BUILD_DIR)
+    if _solver_command is None:
+        print(f"{RED}Built solver not found in {BUILD_DIR}/{RESET}")
+        return False
+    print(f"Solver built: {' '.join(_solver_command)}")
+    return True
+
+
+def measure_startup(runs=5, warmup=True):
+    """
+    Time the solver on a trivial input to estimate its fixed startup cost.
+    Returns the median over runs, excluding the optional warm-up invocation.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = Path(tmp_dir) / "trivial.txt"
+        input_file.write_text(TRIVIAL_INPUT)
+        output_file = Path(tmp_dir) / "trivial_out.txt"
+        cmd = _solver_command + [str(input_file), str(output_file)]
+
+        if warmup:
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter_ns()
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append((time.perf_counter_ns() - start) / 1e9)
+
+    return statistics.median(times) if times else None
+
+
+def parse_phases(text):
+    """Phases from a solver's stderr, or None if it did not report them all."""
+    return Phases.from_ns(
+        {phase: int(ns) for phase, ns in TIMING_PATTERN.findall(text)}
+    )
+
+
+def parse_output_bytes(text):
+    """Report size from a solver's stderr, or None if it did not write one."""
+    match = OUTPUT_PATTERN.search(text)
+    return int(match.group(1)) if match else None
+
+
+def input_name(input_file):
+    """A test input's name without its compression suffix (x.txt for x.txt.gz)."""
+    name = Path(input_file).name
+    return name[: len(name) - len(COMPRESSIONS[compression_of(name)])]
+
+
+def list_inputs(test_dir):
+    """
+    A directory's test inputs, plain or compressed. If a test is there in
+    several formats the plain one is used, as it needs no staging.
+    """
+    inputs = {}
+    for path in sorted(Path(test_dir).glob("*.txt*")):
+        name = input_name(path)
+        if name.endswith(".txt"):
+            inputs.setdefault(name, path)
+    return [inputs[name] for name in sorted(inputs)]
+
+
 def parse_n1_n2_k(filepath):
     """Extract n1, n2, k from filename like test_n1_000010_n2_010000_k_003_002.txt"""
     filename = Path(filepath).stem
@@ -74,89 +469,996 @@ def parse_n1_n2_k(filepath):
     return None, None, None
 
 
-def run_test(input_file, output_file, mode="exact", use_docker=False):
-    """Run single test and return execution time in seconds."""
+def available_cpus():
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cpus(cpus):
+    """Keep one logical CPU per physical core, dropping SMT siblings."""
+    chosen, seen = [], set()
+    for cpu in cpus:
+        path = f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list"
+        try:
+            with open(path) as f:
+                siblings = f.read().strip()
+        except OSError:
+            siblings = str(cpu)
+        if siblings not in seen:
+            seen.add(siblings)
+            chosen.append(cpu)
+    return chosen
+
+
+def warn(message):
+    print(f"{YELLOW}WARNING: {message}{RESET}", file=sys.stderr)
+
+
+def plan_cpus(jobs, timing_quality=False):
+    """
+    Pick one CPU per worker, or None to run sequentially without pinning.
+    Timing-quality mode uses whole physical cores only, keeps RESERVED_CPUS
+    of them free and warns about anything likely to skew measurements.
+    """
+    if jobs <= 1 and not timing_quality:
+        return None
+
+    cpus = available_cpus()
+    if timing_quality:
+        cpus = physical_cpus(cpus)
+        if len(cpus) > RESERVED_CPUS:
+            cpus = cpus[RESERVED_CPUS:]
+        else:
+            warn("no spare core to reserve for the runner and the OS")
+        if jobs > len(cpus):
+            warn(f"--jobs {jobs} exceeds {len(cpus)} usable physical cores")
+            jobs = len(cpus)
+        if jobs > 1:
+            warn(
+                f"{jobs} concurrent tests share caches and memory bandwidth; "
+                "timings may be skewed"
+            )
+        if hasattr(os, "getloadavg") and os.getloadavg()[0] > 1:
+            warn(f"system load is {os.getloadavg()[0]:.2f}; timings may be noisy")
+    elif jobs > len(cpus):
+        warn(f"--jobs {jobs} exceeds {len(cpus)} available CPUs; workers will share")
+        return [cpus[i % len(cpus)] for i in range(jobs)]
+
+    return cpus[:jobs]
+
+
+def container_paths(input_file, output_file):
+    """Map host input/output paths to their mounts inside the container."""
+    output_rel = Path(os.path.relpath(output_file, OUTPUT_DIR)).as_posix()
+    if _staging_dir is not None and Path(input_file).is_relative_to(_staging_dir):
+        staged_rel = Path(os.path.relpath(input_file, _staging_dir)).as_posix()
+        return f"/app/staging/{staged_rel}", f"/app/output/{output_rel}"
+    input_rel = Path(os.path.relpath(input_file, INPUT_DIR)).as_posix()
+    return f"/app/input/{input_rel}", f"/app/output/{output_rel}"
+
+
+class BoundedOutput:
+    """The first and last bytes written to a stream, however much it gets."""
+
+    def __init__(self, head=OUTPUT_HEAD, tail=OUTPUT_TAIL):
+        self.head_size, self.tail_size = head, tail
+        self.head, self.tail = bytearray(), bytearray()
+        self.total = 0
+
+    def feed(self, chunk):
+        self.total += len(chunk)
+        room = self.head_size - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        self.tail += chunk
+        del self.tail[: -self.tail_size]
+
+    def text(self):
+        omitted = self.total - len(self.head) - len(self.tail)
+        middle = f"\n... [{omitted} bytes omitted] ...\n".encode() if omitted else b""
+        return (bytes(self.head) + middle + bytes(self.tail)).decode(errors="replace")
+
+
+class Progress:
+    """Live 'done/total, elapsed, ETA' line on stderr, when it is a terminal."""
+
+    def __init__(self, label, weights):
+        self.label = label
+        self.count, self.total = len(weights), sum(weights)
+        self.done, self.done_weight = 0, 0.0
+        self.start = time.monotonic()
+        self.enabled = sys.stderr.isatty()
+
+    def advance(self, weight):
+        self.done += 1
+        self.done_weight += weight
+        self.draw()
+
+    def line(self):
+        elapsed = time.monotonic() - self.start
+        eta = "?"
+        if self.done_weight > 0:
+            remaining = elapsed * (self.total - self.done_weight) / self.done_weight
+            eta = format_seconds(max(remaining, 0))
+        return (
+            f"{self.label}: {self.done}/{self.count} done, "
+            f"{format_seconds(elapsed)} elapsed, ETA {eta}"
+        )
+
+    def draw(self):
+        if self.enabled:
+            sys.stderr.write(f"\r\033[K{self.line()}")
+            sys.stderr.flush()
+
+    def clear(self):
+        if self.enabled:
+            sys.stderr.write("\r\033[K")
+            sys.stderr.flush()
+
+    async def tick(self):
+        while True:
+            self.draw()
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def log(message):
+    """Print a line, keeping the live progress line (if any) below it."""
+    if _progress is None:
+        print(message)
+        return
+    _progress.clear()
+    print(message, flush=True)
+    _progress.draw()
+
+
+async def with_progress(label, weights, *work):
+    """
+    Run coroutines concurrently under a live progress line over units of
+    the given weights. Returns their results.
+    """
+    global _progress
+    _progress = Progress(label, weights)
+    ticker = asyncio.create_task(_progress.tick())
+    try:
+        return await asyncio.gather(*work)
+    finally:
+        ticker.cancel()
+        _progress.clear()
+        _progress = None
+
+
+def advance(weight):
+    if _progress is not None:
+        _progress.advance(weight)
+
+
+async def pipe_reader(pipe):
+    """An asyncio stream over a subprocess pipe, which it takes ownership of."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=READ_CHUNK)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader
+
+
+async def drain(reader, output):
+    """Read a stream to its end into a BoundedOutput."""
+    while chunk := await reader.read(READ_CHUNK):
+        output.feed(chunk)
+
+
+def kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def run_batch(
+    tests, mode="exact", cpu=None, timeout=DEFAULT_TIMEOUT, timeouts=None, sink=None
+):
+    """
+    Run tests through the solver's in-container batch driver: one docker exec for
+    the whole list, one JSON result line streamed back per test, timed inside the
+    container with a monotonic clock. timeouts optionally gives a per-test
+    timeout by input file; sink (file or null) where reports go. Returns
+    {test index: Run}.
+    """
+    sink = sink or OutputSink()
+    timeouts = timeouts or {}
+    results = {}
+    pending = list(range(len(tests)))
+
+    while pending:
+        cmd = ["docker", "exec", "-i", CONTAINER_NAME]
+        if cpu is not None:
+            cmd.extend(["taskset", "-c", str(cpu)])
+        cmd.extend(["dotnet", "Grafy TAiO.dll", "--batch", str(timeout)])
+
+        jobs = []
+        for i in pending:
+            _, test_file, output_file = tests[i]
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            limit = str(timeouts.get(test_file, timeout))
+            container_input, _ = container_paths(test_file, output_file)
+            destination = sink.destination(output_file, use_docker=True)
+            jobs.append("\t".join([mode, container_input, destination, limit]))
+
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+
+        async def feed():
+            # Written alongside reading results, so a long job list cannot
+            # deadlock against the driver's output
+            proc.stdin.write(("\n".join(jobs) + "\n").encode())
+            await proc.stdin.drain()
+            proc.stdin.close()
+
+        stderr = BoundedOutput()
+        background = asyncio.gather(feed(), drain(proc.stderr, stderr))
+
+        reported = set()
+        async for line in proc.stdout:
+            if not line.startswith(b"{"):
+                continue
+            record = json.loads(line)
+            i = pending[record["index"]]
+            reported.add(i)
+            test_file = tests[i][1]
+            limit = timeouts.get(test_file, timeout)
+            elapsed = record["elapsed_ns"] / 1e9
+
+            if record["status"] == "ok":
+                log(f"  {test_file.name} - {elapsed:.3f}s")
+                phases = Phases.from_ns(record.get("phases_ns") or {})
+                results[i] = Run(elapsed, None, phases, record.get("output_bytes"))
+            elif record["status"] == "timeout":
+                log(f"{RED}  TIMEOUT: {test_file.name} (>{limit}s){RESET}")
+            else:
+                log(f"{RED}  FAILED: {test_file.name} - {record['error']}{RESET}")
+            advance(limit)
+
+        await background
+        await proc.wait()
+        remaining = [i for i in pending if i not in reported]
+        if remaining and proc.returncode != BATCH_TIMEOUT_EXIT:
+            log(
+                f"{RED}  Batch driver exited with code {proc.returncode}, "
+                f"{len(remaining)} tests not run{RESET}"
+            )
+            if stderr.total:
+                log(f"{RED}     Error: {stderr.text()[:150]}{RESET}")
+            break
+        pending = remaining
+
+    return results
+
+
+async def run_reaped(cmd, timeout, stream=None):
+    """
+    Run cmd in its own process group, streaming its stdout and stderr into
+    bounded buffers, and reap it with os.wait4 to get its resource usage.
+    With stream, stdout is fed to it instead (and the stream closed). After
+    timeout seconds, or if cancelled, the whole group is killed; after a normal
+    exit, whatever the solver left running in it. Returns (exit code, elapsed
+    seconds, Usage, stdout, stderr), the outputs cut to their head and tail;
+    the exit code is None if the process timed out.
+    """
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    stdout, stderr = BoundedOutput(), BoundedOutput()
+
+    start = time.perf_counter_ns()
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    # The group id is ours only until the leader is reaped, after which it can
+    # be reused: kills check reaped under the lock the reaper holds to reap
+    lock = threading.Lock()
+    reaped = False
+
+    def kill():
+        with lock:
+            if not reaped:
+                kill_group(proc.pid)
+
+    def reap():
+        nonlocal reaped
+        if hasattr(os, "waitid"):
+            # Wait without reaping, so the group id stays ours while anything
+            # the solver left running (holding the pipes open) is killed
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            # Timed in the reaping thread, so a busy event loop does not inflate it
+            end = time.perf_counter_ns()
+            with lock:
+                kill_group(proc.pid)
+                _, status, rusage = os.wait4(proc.pid, 0)
+                reaped = True
+        else:
+            # No waitid (macOS): stragglers cannot be killed safely, so are not
+            _, status, rusage = os.wait4(proc.pid, 0)
+            end = time.perf_counter_ns()
+            with lock:
+                reaped = True
+        loop.call_soon_threadsafe(exited.set_result, (end, status, rusage))
+
+    threading.Thread(target=reap, daemon=True).start()
+    readers = asyncio.gather(
+        drain(await pipe_reader(proc.stdout), stream or stdout),
+        drain(await pipe_reader(proc.stderr), stderr),
+    )
+    timed_out = False
+    try:
+        end, status, rusage = await asyncio.wait_for(asyncio.shield(exited), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        kill()
+        end, status, rusage = await exited
+    except asyncio.CancelledError:
+        kill()
+        raise
+    try:
+        await readers
+    finally:
+        if stream is not None:
+            stream.close()
+    # Tell Popen the child is gone so it does not try to reap it again
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    returncode = None if timed_out else proc.returncode
+    usage = Usage.from_rusage(rusage)
+    return returncode, (end - start) / 1e9, usage, stdout.text(), stderr.text()
+
+
+async def run_test(
+    input_file,
+    output_file,
+    mode="exact",
+    use_docker=False,
+    cpu=None,
+    verbose=True,
+    timeout=DEFAULT_TIMEOUT,
+    sink=None,
+):
+    """Run single test and return its Run, or None if it failed."""
+    sink = sink or OutputSink()
+    destination = sink.destination(output_file, use_docker)
     if use_docker:
-        input_rel = os.path.relpath(input_file, INPUT_DIR)
-        output_rel = os.path.relpath(output_file, OUTPUT_DIR)
+        container_input, _ = container_paths(input_file, output_file)
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-        cmd = ["docker", "exec", CONTAINER_NAME, "dotnet", "Grafy TAiO.dll"]
+        cmd = ["docker", "exec", CONTAINER_NAME]
+        if cpu is not None:
+            # The solver runs inside the container, so pin it there
+            cmd.extend(["taskset", "-c", str(cpu)])
+        cmd.extend(["dotnet", "Grafy TAiO.dll"])
         if mode == "approx":
             cmd.append("-a")
-        cmd.extend([f"/app/input/{input_rel}", f"/app/output/{output_rel}"])
+        cmd.extend([container_input, destination])
     else:
-        cmd = ["dotnet", "run", "--project", "Grafy TAiO/Grafy TAiO.csproj", "--"]
+        cmd = []
+        if cpu is not None:
+            # Pinned by taskset before it execs the solver: a preexec_fn is
+            # not safe while the runner has threads
+            cmd.extend(["taskset", "-c", str(cpu)])
+        cmd.extend(_solver_command)
         if mode == "approx":
             cmd.append("-a")
         cmd.append(str(input_file))
-        cmd.append(str(output_file))
+        cmd.append(destination)
 
-    start = time.time()
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        elapsed = time.time() - start
+        returncode, elapsed, usage, _, stderr = await run_reaped(
+            cmd, timeout, sink.stream(output_file)
+        )
+        if returncode is None:
+            log(f"{RED}  TIMEOUT: {input_file.name} (>{timeout}s){RESET}")
+            return None
 
-        if result.returncode != 0:
-            print(
-                f"{RED}  FAILED: {input_file.name} - Exit code: {result.returncode}{RESET}"
-            )
-            if result.stderr:
-                print(f"{RED}     Error: {result.stderr[:150]}{RESET}")
+        if returncode != 0:
+            log(f"{RED}  FAILED: {input_file.name} - Exit code: {returncode}{RESET}")
+            if stderr:
+                log(f"{RED}     Error: {stderr[:150]}{RESET}")
             return None
 
-        if not os.path.exists(output_file):
-            print(f"{RED}  WARNING: Output file not created: {output_file}{RESET}")
+        if sink.kind == "file" and not os.path.exists(output_file):
+            log(f"{RED}  WARNING: Output file not created: {output_file}{RESET}")
 
-        print(f"  {input_file.name} - {elapsed:.3f}s")
-        return elapsed
-    except subprocess.TimeoutExpired:
-        print(f"{RED}  TIMEOUT: {input_file.name} (>300s){RESET}")
-        return None
+        if verbose:
+            log(f"  {input_file.name} - {elapsed:.3f}s")
+        # Under docker exec the child is the docker client, not the solver
+        return Run(
+            elapsed,
+            None if use_docker else usage,
+            parse_phases(stderr),
+            parse_output_bytes(stderr),
+        )
     except FileNotFoundError as e:
-        print(f"{RED}  ERROR: {input_file.name} - Command not found: {e}{RESET}")
+        log(f"{RED}  ERROR: {input_file.name} - Command not found: {e}{RESET}")
         return None
     except Exception as e:
-        print(f"{RED}  ERROR: {input_file.name} - {e}{RESET}")
+        log(f"{RED}  ERROR: {input_file.name} - {e}{RESET}")
         return None
 
 
-def run_all_tests(test_dir, output_dir, mode="exact", use_docker=False):
-    """Run all tests in directory, return dict of n1 -> [times]"""
+def bootstrap_ci(times, resamples=BOOTSTRAP_RESAMPLES, level=0.95):
+    """Percentile bootstrap confidence interval of the median."""
+    if len(times) < 2:
+        return times[0], times[0]
+    rng = random.Random(0)
+    medians = sorted(
+        statistics.median(rng.choices(times, k=len(times))) for _ in range(resamples)
+    )
+    tail = (1 - level) / 2
+    return medians[int(tail * resamples)], medians[int((1 - tail) * resamples) - 1]
+
+
+def drop_outliers(times):
+    """Drop samples outside Tukey's fences (1.5 IQR beyond the quartiles)."""
+    if len(times) < 4:
+        return list(times)
+    q1, _, q3 = statistics.quantiles(times, n=4)
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    return [t for t in times if low <= t <= high]
+
+
+def percentile(times, p):
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(times):
+    """Robust statistics of a group of timings, after dropping outliers."""
+    kept = drop_outliers(times)
+    ci_low, ci_high = bootstrap_ci(kept)
+    return {
+        "count": len(kept),
+        "outliers": len(times) - len(kept),
+        "mean": statistics.fmean(kept),
+        "median": statistics.median(kept),
+        "p95": percentile(kept, 95),
+        "std": statistics.stdev(kept) if len(kept) > 1 else 0.0,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+    }
+
+
+def is_precise(times, bench):
+    """Whether the median's bootstrap CI is already tight enough to stop."""
+    if bench.ci_target <= 0 or len(times) < max(bench.min_repeat, 2):
+        return False
+    low, high = bootstrap_ci(times, EARLY_STOP_RESAMPLES)
+    return (high - low) / 2 <= bench.ci_target * statistics.median(times)
+
+
+async def measure_test(
+    input_file,
+    output_file,
+    mode,
+    use_docker,
+    bench,
+    cpu=None,
+    timeout=DEFAULT_TIMEOUT,
+    sink=None,
+):
+    """
+    Run a test bench.warmup times unmeasured, then up to bench.repeat times,
+    stopping early once the timings are precise enough. Returns the Runs.
+    """
+    verbose = bench.repeat == 1 and bench.warmup == 0
+    args = (input_file, output_file, mode, use_docker, cpu)
+    for _ in range(bench.warmup):
+        if await run_test(*args, False, timeout, sink) is None:
+            return []
+
+    runs, times = [], []
+    for _ in range(bench.repeat):
+        run = await run_test(*args, verbose, timeout, sink)
+        if run is None:
+            break
+        runs.append(run)
+        times.append(run.elapsed)
+        if is_precise(times, bench):
+            break
+
+    if times and not verbose:
+        log(
+            f"  {input_file.name} - median {statistics.median(times):.3f}s "
+            f"over {len(times)} runs"
+        )
+    return runs
+
+
+def store_runs(store, mode, test_file, key, runs, journal=None):
+    """
+    Append a test's measured runs to the results store, and record the test
+    as finished in the journal (even if it has no runs).
+    """
+    if store is None and journal is None:
+        return
+    n1, n2, k = key
+    input_hash = store.input_hash(test_file) if store is not None else None
+    rows = []
+    for repetition, run in enumerate(runs):
+        row = {
+            "mode": mode,
+            "graph_type": test_file.parent.name,
+            "input": str(test_file),
+            "input_hash": input_hash,
+            "n1": n1,
+            "n2": n2,
+            "k": k,
+            "repetition": repetition,
+            "elapsed": run.elapsed,
+            "output_bytes": run.output_bytes,
+            "solver_hash": store and store.solver_hashes.get(mode),
+        }
+        if run.usage is not None:
+            row.update(run.usage._asdict())
+        if run.phases is not None:
+            row.update(run.phases._asdict())
+        rows.append(row)
+    if store is not None:
+        store.record(rows)
+    if journal is not None:
+        journal.record(mode, test_file, rows)
+
+
+def run_from_row(row):
+    """Rebuild a Run from a results store row."""
+    usage = phases = None
+    if row["max_rss_kb"] is not None:
+        usage = Usage(*(row[field] for field in Usage._fields))
+    if row["solve_time"] is not None:
+        phases = Phases(*(row[field] for field in Phases._fields))
+    return Run(row["elapsed"], usage, phases, row["output_bytes"])
+
+
+def read_journal(path):
+    """
+    A journal's header, its finished tests as {(mode, input): rows}, and the
+    length of its complete lines; a last line cut short by a kill is ignored.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    lines = data[:complete].splitlines()
+    header = json.loads(lines[0]) if lines else None
+    done = {}
+    for line in lines[1:]:
+        entry = json.loads(line)
+        done[(entry["mode"], entry["input"])] = entry["rows"]
+    return header, done, complete
+
+
+class Journal:
+    """
+    Append-only JSON-lines record of a sweep's finished tests, written as each
+    test completes so that an interrupted sweep resumes where it stopped. The
+    first line names the shard; every other line holds one test's store rows
+    (none if it failed), stamped with the run metadata.
+    """
+
+    def __init__(self, path, shard=None, meta=None):
+        self.path = path
+        self.shard = list(shard) if shard is not None else None
+        self.meta = meta or {}
+        self.done = {}
+        self.lock = threading.Lock()
+        header = None
+        if os.path.exists(path):
+            header, self.done, complete = read_journal(path)
+            # A cut line would otherwise run into the next record
+            os.truncate(path, complete)
+        if header is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.append({"shard": self.shard, "created_at": time.time()})
+        elif header["shard"] != self.shard:
+            raise ValueError(
+                f"{path} is the journal of shard {format_shard(header['shard'])}"
+            )
+
+    def append(self, entry):
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record(self, mode, test_file, rows):
+        """Record a test as finished. Safe to call from several threads."""
+        defaults = {**self.meta, "recorded_at": time.time()}
+        defaults.update(repetition=0, status="ok")
+        rows = [{c: {**defaults, **row}.get(c) for c in COLUMNS} for row in rows]
+        self.done[(mode, str(test_file))] = rows
+        self.append({"mode": mode, "input": str(test_file), "rows": rows})
+
+    def resume(self, mode, tests, results):
+        """
+        Add the runs of tests the journal has finished to results; returns
+        the tests that still need to run.
+        """
+        remaining = []
+        for key, test_file, output_file in tests:
+            rows = self.done.get((mode, str(test_file)))
+            if rows is None:
+                remaining.append((key, test_file, output_file))
+            else:
+                results[key].extend(run_from_row(row) for row in rows)
+        if len(remaining) < len(tests):
+            print(
+                f"{len(tests) - len(remaining)} tests already in {self.path}, "
+                f"{len(remaining)} to run"
+            )
+        return remaining
+
+
+def reuse_cached(store, mode, tests, results, only_changed=False, journal=None):
+    """
+    Look tests up in the results store by input hash, solver binary, mode and
+    runner options. Hits are added to results from the stored runs (or left
+    out entirely with only_changed) and recorded in the journal; returns the
+    tests that still need to run.
+    """
+    remaining = []
+    hits = 0
+    for key, test_file, output_file in tests:
+        rows = store.cached(store.input_hash(test_file), mode)
+        if not rows:
+            remaining.append((key, test_file, output_file))
+            continue
+        hits += 1
+        if only_changed:
+            continue
+        if journal is not None:
+            journal.record(mode, test_file, rows)
+        runs = [run_from_row(row) for row in rows]
+        results[key].extend(runs)
+        median = statistics.median(run.elapsed for run in runs)
+        print(f"  {test_file.name} - cached {median:.3f}s ({len(runs)} runs)")
+    if hits:
+        print(f"{hits} tests unchanged since a previous run, {len(remaining)} to run")
+    return remaining
+
+
+def plan_tests(model, mode, tests, timeout=DEFAULT_TIMEOUT):
+    """
+    Predict each test's run time. Tests predicted to exceed timeout are
+    skipped; the rest are ordered longest-first (unpredicted ones first) so
+    parallel workers finish together. Returns the tests to run and their
+    per-test timeouts by input file.
+    """
+    planned = []
+    for test in tests:
+        key, test_file, _ = test
+        predicted = model.predict(mode, *key)
+        if predicted is not None and predicted > timeout:
+            print(
+                f"{YELLOW}  {test_file.name} - skipped: predicted {predicted:.0f}s{RESET}"
+            )
+            continue
+        planned.append((predicted, test))
+
+    planned.sort(key=lambda p: -math.inf if p[0] is None else -p[0])
+    timeouts = {
+        test[1]: model.timeout(predicted, timeout) for predicted, test in planned
+    }
+    return [test for _, test in planned], timeouts
+
+
+def pack_shares(tests, timeouts, count):
+    """
+    Split tests (ordered longest-first) into count shares of similar total
+    time, giving each test to the least loaded share. A test weighs its
+    timeout, which grows with its predicted time. Returns lists of indices.
+    """
+    shares = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for i, (_, test_file, _) in enumerate(tests):
+        j = loads.index(min(loads))
+        shares[j].append(i)
+        loads[j] += timeouts.get(test_file, 1.0)
+    return [sorted(share) for share in shares]
+
+
+def format_shard(shard):
+    return "-" if shard is None else f"{shard[0] + 1}/{shard[1]}"
+
+
+def shard_weight(mode, input_file):
+    """
+    A test's share of a sweep: the cost model's work estimate, capped at
+    SHARD_WORK_CAP. Unlike calibrated predictions it depends only on the
+    test's size, so every machine weighs the inputs the same way.
+    """
+    n1, n2, k = parse_n1_n2_k(input_file)
+    if n1 is None:
+        return 1.0
+    return math.exp(min(log_work(mode, n1, n2, k), math.log(SHARD_WORK_CAP)))
+
+
+def shard_inputs(mode, inputs, shard):
+    """
+    The inputs of a mode (across its graph types) that shard (index, count)
+    runs: heaviest first, each to the least loaded shard (see pack_shares),
+    so the shards' predicted costs are balanced rather than their file
+    counts. Deterministic for the same set of inputs.
+    """
+    index, count = shard
+    weights = {f: shard_weight(mode, f) for f in inputs}
+    ordered = sorted(inputs, key=lambda f: (-weights[f], str(f)))
+    shares = pack_shares([(None, f, None) for f in ordered], weights, count)
+    return {ordered[i] for i in shares[index]}
+
+
+def run_all_tests(
+    test_dir,
+    output_dir,
+    mode="exact",
+    use_docker=False,
+    cpus=None,
+    batch=False,
+    bench=Benchmark(),
+    store=None,
+    force=False,
+    only_changed=False,
+    model=None,
+    timeout=DEFAULT_TIMEOUT,
+    sink=None,
+    staging=None,
+    inputs=None,
+    journal=None,
+):
+    """
+    Run all tests in directory, return dict of (n1, n2, k) -> [Run].
+    Tests run as asyncio subprocesses whose output is kept only in bounded
+    buffers, under a live progress line. With cpus, tests are taken from a
+    shared queue by one worker per CPU, each pinned to its own CPU. With
+    batch (Docker only), tests are handed to the in-container batch driver
+    instead of one docker exec per test. sink decides where reports go.
+    Compressed inputs are decompressed through staging just before their
+    test, the next queued input in the background while a test runs.
+    inputs, if given, limits the run to those input files (a shard). Each
+    finished test is recorded in journal, and tests it already has are
+    reported from it instead of being run.
+    Each input is measured according to bench, and its runs are appended to
+    store if given. Unless force, inputs the store already has results for
+    (same input, solver and options) are reported from it instead of re-run.
+    With a cost model, tests predicted to exceed timeout are skipped, the
+    rest run longest-first under per-test timeouts derived from predictions.
+    """
     results = defaultdict(list)
     os.makedirs(output_dir, exist_ok=True)
 
     print(f"\n=== Running {mode.upper()} tests from {test_dir} ===")
 
-    for test_file in sorted(Path(test_dir).glob("*.txt")):
+    tests = []
+    for test_file in list_inputs(test_dir):
+        if inputs is not None and test_file not in inputs:
+            continue
         n1, n2, k = parse_n1_n2_k(test_file)
 
         if n2 > 10000:
             print("too big n2", file=sys.stderr)
             continue
 
-        output_file = Path(output_dir) / test_file.name.replace(".txt", "_out.txt")
-        elapsed = run_test(test_file, output_file, mode, use_docker)
-        if elapsed is not None:
-            results[(n1, n2, k)].append(elapsed)
+        if use_docker and batch and compression_of(test_file) != "none":
+            print(
+                f"{YELLOW}  {test_file.name} - skipped: compressed inputs "
+                f"need per-test runs{RESET}"
+            )
+            continue
+
+        output_name = input_name(test_file).replace(".txt", "_out.txt")
+        tests.append(((n1, n2, k), test_file, Path(output_dir) / output_name))
+
+    if journal is not None:
+        tests = journal.resume(mode, tests, results)
+    if store is not None and not force:
+        tests = reuse_cached(store, mode, tests, results, only_changed, journal)
+    if not tests:
+        return results
+
+    timeouts = {}
+    if model is not None:
+        tests, timeouts = plan_tests(model, mode, tests, timeout)
+    limits = {test_file: timeouts.get(test_file, timeout) for _, test_file, _ in tests}
+
+    label = f"{mode} {Path(test_dir).name}"
+    if use_docker and batch:
+        # Warm-up and repeated runs are queued as extra jobs; the driver does
+        # not stop early. Runs of a test stay consecutive within one driver.
+        runs_per_test = bench.warmup + bench.repeat
+        runs = [test for test in tests for _ in range(runs_per_test)]
+        shares = pack_shares(tests, limits, len(cpus) if cpus is not None else 1)
+        batches = (
+            run_batch(
+                [
+                    runs[t * runs_per_test + r]
+                    for t in share
+                    for r in range(runs_per_test)
+                ],
+                mode,
+                cpus[j] if cpus is not None else None,
+                timeout,
+                limits,
+                sink,
+            )
+            for j, share in enumerate(shares)
+        )
+        weights = [limits[test_file] for _, test_file, _ in runs]
+        reported = asyncio.run(with_progress(label, weights, *batches))
+
+        measured = defaultdict(list)
+        for share, batch_results in zip(shares, reported):
+            for local, run in sorted(batch_results.items()):
+                test, repetition = divmod(local, runs_per_test)
+                if repetition >= bench.warmup:
+                    measured[share[test]].append(run)
+        # Results only come back with the whole batch, so that is when they
+        # are journaled
+        for i, (key, test_file, _) in enumerate(tests):
+            runs = measured.get(i, [])
+            results[key].extend(runs)
+            store_runs(store, mode, test_file, key, runs, journal)
+        return results
+
+    staging = staging or InputStaging()
+    pending = deque(tests)
+
+    async def worker(cpu):
+        while pending:
+            key, test_file, output_file = pending.popleft()
+            try:
+                input_file = await staging.fetch(test_file)
+            except Exception as e:
+                log(f"{RED}  ERROR: {test_file.name} - cannot decompress: {e}{RESET}")
+                staging.release(test_file)
+                await asyncio.to_thread(
+                    store_runs, store, mode, test_file, key, [], journal
+                )
+                advance(limits[test_file])
+                continue
+            if pending:
+                # Decompress the next queued input while this test runs
+                staging.prefetch(pending[0][1])
+            runs = await measure_test(
+                input_file,
+                output_file,
+                mode,
+                use_docker,
+                bench,
+                cpu,
+                limits[test_file],
+                sink,
+            )
+            staging.release(test_file)
+            results[key].extend(runs)
+            # Hashing a large input or verifying a staged report must not
+            # stall other workers' output
+            await asyncio.to_thread(
+                store_runs, store, mode, test_file, key, runs, journal
+            )
+            if sink is not None:
+                await asyncio.to_thread(sink.settle, test_file, output_file)
+            advance(limits[test_file])
 
+    workers = [worker(cpu) for cpu in cpus or [None]]
+    weights = [limits[test_file] for _, test_file, _ in tests]
+    asyncio.run(with_progress(label, weights, *workers))
     return results
 
 
 def print_stats(results, label):
-    """Print average times per (n1, n2, k)."""
+    """Print robust timing statistics per (n1, n2, k)."""
     if not results:
         print(f"\n=== {label} - No results ===")
         return
 
     print(f"\n=== {label} RESULTS ===")
-    print(f"{'n1':<8} {'n2':<8} {'k':<6} {'Count':<8} {'Avg Time (s)':<15}")
-    print("-" * 50)
+    print(
+        f"{'n1':<8} {'n2':<8} {'k':<6} {'Count':<7} {'Out':<5} {'Mean (s)':<10} "
+        f"{'Median':<10} {'P95':<10} {'Std':<10} {'95% CI (median)':<21}"
+    )
+    print("-" * 102)
 
     for n1, n2, k in sorted(results.keys()):
-        times = results[(n1, n2, k)]
-        avg = sum(times) / len(times)
-        print(f"{n1:<8} {n2:<8} {k:<6} {len(times):<8} {avg:<15.4f}")
+        times = [run.elapsed for run in results[(n1, n2, k)]]
+        if not times:
+            continue
+        s = summarize(times)
+        ci = f"[{s['ci_low']:.4f}, {s['ci_high']:.4f}]"
+        print(
+            f"{n1:<8} {n2:<8} {k:<6} {s['count']:<7} {s['outliers']:<5} "
+            f"{s['mean']:<10.4f} {s['median']:<10.4f} {s['p95']:<10.4f} "
+            f"{s['std']:<10.4f} {ci:<21}"
+        )
+
+    print_usage(results)
+    print_phases(results)
+
+
+def print_usage(results):
+    """Print median resource usage per run for each (n1, n2, k)."""
+    usage = {
+        key: [run.usage for run in runs if run.usage is not None]
+        for key, runs in results.items()
+    }
+    if not any(usage.values()):
+        return
+
+    print("\n--- Resource usage (median per run) ---")
+    print(
+        f"{'n1':<8} {'n2':<8} {'k':<6} {'RSS (MB)':<10} {'User (s)':<10} "
+        f"{'Sys (s)':<10} {'MajFlt':<8} {'MinFlt':<10} {'VolCS':<8} {'InvCS':<8}"
+    )
+    print("-" * 92)
+
+    for n1, n2, k in sorted(usage.keys()):
+        runs = usage[(n1, n2, k)]
+        if not runs:
+            continue
+        m = Usage(*(statistics.median(values) for values in zip(*runs)))
+        print(
+            f"{n1:<8} {n2:<8} {k:<6} {m.max_rss_kb / 1024:<10.1f} {m.user_time:<10.4f} "
+            f"{m.sys_time:<10.4f} {m.major_faults:<8.0f} {m.minor_faults:<10.0f} "
+            f"{m.voluntary_switches:<8.0f} {m.involuntary_switches:<8.0f}"
+        )
+
+
+def print_phases(results):
+    """
+    Print the solver's median time per phase for each (n1, n2, k), with the
+    share of the run the solve itself takes and the median report size.
+    """
+    phases = {
+        key: [run.phases for run in runs if run.phases is not None]
+        for key, runs in results.items()
+    }
+    if not any(phases.values()):
+        return
+
+    print("\n--- Solver phases (median per run) ---")
+    print(
+        f"{'n1':<8} {'n2':<8} {'k':<6} {'Read (s)':<10} {'Solve (s)':<10} "
+        f"{'Format (s)':<11} {'Write (s)':<10} {'Solve %':<8} {'Output (MB)':<11}"
+    )
+    print("-" * 88)
+
+    for n1, n2, k in sorted(phases.keys()):
+        runs = phases[(n1, n2, k)]
+        if not runs:
+            continue
+        m = Phases(*(statistics.median(values) for values in zip(*runs)))
+        total = sum(m)
+        share = f"{100 * m.solve_time / total:.1f}" if total > 0 else "-"
+        sizes = [
+            run.output_bytes
+            for run in results[(n1, n2, k)]
+            if run.output_bytes is not None
+        ]
+        size = f"{statistics.median(sizes) / 2**20:.2f}" if sizes else "-"
+        print(
+            f"{n1:<8} {n2:<8} {k:<6} {m.read_time:<10.4f} {m.solve_time:<10.4f} "
+            f"{m.format_time:<11.4f} {m.write_time:<10.4f} {share:<8} {size:<11}"
+        )
 
 
 def discover_graph_types(mode):
@@ -166,9 +1468,7 @@ def discover_graph_types(mode):
         return []
 
     return [
-        d.name
-        for d in sorted(mode_path.iterdir())
-        if d.is_dir() and list(d.glob("*.txt"))
+        d.name for d in sorted(mode_path.iterdir()) if d.is_dir() and list_inputs(d)
     ]
 
 
@@ -179,6 +1479,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--docker", action="store_true", help="Use Docker instead of direct dotnet"
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="With --docker, run all tests through one in-container batch driver",
+    )
     parser.add_argument(
         "--mode",
         type=str,
@@ -193,13 +1498,197 @@ if __name__ == "__main__":
         default=None,
         help="Graph types to test (default: all)",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of tests to run at the same time, each pinned to its own CPU",
+    )
+    parser.add_argument(
+        "--timing-quality",
+        action="store_true",
+        help="Use whole physical cores only, reserve a core for the OS and warn "
+        "when concurrency may skew timings",
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Run the solver once on a trivial input before measuring anything",
+    )
+    parser.add_argument(
+        "--startup-runs",
+        type=int,
+        default=5,
+        help="Trivial-input runs used to measure solver startup overhead (0 to skip)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Maximum measured runs per input",
+    )
+    parser.add_argument(
+        "--input-warmup",
+        type=int,
+        default=0,
+        help="Unmeasured runs per input before measuring",
+    )
+    parser.add_argument(
+        "--min-repeat",
+        type=int,
+        default=3,
+        help="Measured runs per input before early stopping is considered",
+    )
+    parser.add_argument(
+        "--ci-target",
+        type=float,
+        default=0.0,
+        help="Stop repeating an input once the 95%% CI half-width of its median "
+        "is below this fraction of the median (0 disables early stopping)",
+    )
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=DEFAULT_DB,
+        help="Results store to append every measured run to",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Do not record results in the store",
+    )
+    parser.add_argument(
+        "--name",
+        type=str,
+        default=None,
+        help="Name the recorded run (e.g. a baseline for compare.py)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run every test, even if the store has results for it",
+    )
+    parser.add_argument(
+        "--only-changed",
+        action="store_true",
+        help="Run and report only tests whose input or solver changed",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=DEFAULT_TIMEOUT,
+        help="Longest a test may run (seconds); tests predicted to exceed it "
+        "are skipped",
+    )
+    parser.add_argument(
+        "--no-predict",
+        action="store_true",
+        help="Do not use the cost model calibrated from the store: run every "
+        "test in order with the full timeout",
+    )
+    parser.add_argument(
+        "--output-sink",
+        choices=OUTPUT_SINKS,
+        default="file",
+        help="Where solver reports go: file (output/), null (/dev/null), tmpfs "
+        "(RAM, kept only if verification fails), summary (edit count and "
+        "mappings only) or zstd (compressed as they stream)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=str,
+        default=None,
+        help="Run only shard i of N (e.g. 2/4) of the inputs, split by predicted "
+        "cost the same way on every machine; journaled to "
+        f"{JOURNAL_DIR}/shard-i-of-N.jsonl unless --journal is given",
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        help="Record every finished test in this file, and skip tests it already "
+        "has (resume an interrupted sweep)",
+    )
     args = parser.parse_args()
+    shard = None
+    if args.shard is not None:
+        match = re.fullmatch(r"(\d+)/(\d+)", args.shard)
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            parser.error(f"--shard expects i/N with 1 <= i <= N, got {args.shard}")
+        shard = (int(match.group(1)) - 1, int(match.group(2)))
+        if args.journal is None:
+            args.journal = os.path.join(
+                JOURNAL_DIR, f"shard-{shard[0] + 1}-of-{shard[1]}.jsonl"
+            )
+    if args.batch and args.output_sink not in ("file", "null"):
+        parser.error(f"--output-sink {args.output_sink} needs per-test runs")
+    if args.docker and args.output_sink == "tmpfs":
+        parser.error("--output-sink tmpfs stages reports on the host")
+    if args.output_sink == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error("--output-sink zstd needs the zstandard package")
 
+    bench = Benchmark(args.input_warmup, args.repeat, args.min_repeat, args.ci_target)
+    sink = OutputSink(args.output_sink)
+    staging = InputStaging()
     modes = ["exact", "approx"] if args.mode == "both" else [args.mode]
+    cpus = plan_cpus(args.jobs, args.timing_quality)
 
-    if args.docker and not start_docker_container():
+    if args.docker and not start_docker_container(staging.directory):
         exit(1)
 
+    startup = None
+    if not args.docker:
+        if not build_solver():
+            exit(1)
+        if args.startup_runs > 0 or args.warmup:
+            startup = measure_startup(args.startup_runs, args.warmup)
+            if startup is not None:
+                print(f"Solver startup overhead: {startup:.4f}s (median)")
+
+    store = None
+    if not args.no_store:
+        solver = container_image() if args.docker else binary_hash(BUILD_DIR)
+        options = {
+            "docker": args.docker,
+            "batch": args.batch,
+            "pinned": cpus is not None,
+            "timing_quality": args.timing_quality,
+            **bench._asdict(),
+        }
+        if args.output_sink != "file":
+            # Only recorded when set, so existing results stay reusable
+            options["output_sink"] = args.output_sink
+        # The container image may not match the sources, so Docker results
+        # are keyed by the image alone
+        solver_hashes = None
+        if not args.docker:
+            solver_hashes = {mode: solver_hash(mode) for mode in modes}
+        store = ResultsStore(
+            args.db, solver, json.dumps(options, sort_keys=True), solver_hashes
+        )
+        print(f"Recording results in {args.db} (run {store.meta['run_id']})")
+
+    journal = None
+    if args.journal is not None:
+        try:
+            journal = Journal(args.journal, shard, store and store.meta)
+        except ValueError as e:
+            parser.error(str(e))
+        print(
+            f"Journaling finished tests to {args.journal} "
+            f"({len(journal.done)} already finished)"
+        )
+
+    model = None
+    if not args.no_predict:
+        model = CostModel.calibrate(args.db, store and store.meta["binary_hash"])
+        if model.params:
+            print(f"Cost model calibrated for: {', '.join(sorted(model.params))}")
+
     all_results = {}
     for mode in modes:
         available_types = discover_graph_types(mode)
@@ -210,11 +1699,41 @@ if __name__ == "__main__":
         types_to_run = args.types if args.types else available_types
         types_to_run = [t for t in types_to_run if t in available_types]
 
+        inputs = None
+        if shard is not None:
+            mode_inputs = [
+                test_file
+                for graph_type in types_to_run
+                for test_file in list_inputs(f"{INPUT_DIR}/{mode}/{graph_type}/")
+            ]
+            inputs = shard_inputs(mode, mode_inputs, shard)
+            print(
+                f"Shard {format_shard(shard)} of {mode}: {len(inputs)} of "
+                f"{len(mode_inputs)} inputs"
+            )
+
         for graph_type in types_to_run:
             input_dir = f"{INPUT_DIR}/{mode}/{graph_type}/"
             output_dir = f"{OUTPUT_DIR}/{mode}/{graph_type}/"
 
-            results = run_all_tests(input_dir, output_dir, mode, args.docker)
+            results = run_all_tests(
+                input_dir,
+                output_dir,
+                mode,
+                args.docker,
+                cpus,
+                args.batch,
+                bench,
+                store,
+                args.force,
+                args.only_changed,
+                model,
+                args.timeout,
+                sink,
+                staging,
+                inputs,
+                journal,
+            )
             label = f"{graph_type.upper()} ({mode})"
             all_results[label] = results
             print_stats(results, label)
@@ -223,8 +1742,18 @@ if __name__ == "__main__":
     print("\n" + "=" * 50)
     print("SUMMARY")
     print("=" * 50)
+    if startup is not None:
+        print(f"Startup overhead (trivial input): {startup:.4f}s per test")
     for label, results in all_results.items():
         if results:
-            total_tests = sum(len(times) for times in results.values())
-            total_time = sum(sum(times) for times in results.values())
+            total_tests = sum(len(runs) for runs in results.values())
+            total_time = sum(run.elapsed for runs in results.values() for run in runs)
             print(f"{label}: {total_tests} tests, {total_time:.2f}s total")
+
+    if store is not None and args.name:
+        conn = connect(args.db)
+        try:
+            name_run(conn, args.name, store.meta["run_id"])
+        finally:
+            conn.close()
+        print(f"Run saved as '{args.name}'")
@@ -0,0 +1,102 @@
+"""Tests of compare.py's statistics and exit codes."""
+
+import math
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from compare import average_ranks, compare, holm, mann_whitney, min_p_value
+from results_store import ResultsStore, connect, name_run
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIZE = {"mode": "exact", "graph_type": "random", "n1": 4, "n2": 3, "k": 2}
+
+
+def test_exact_p_value_of_separated_samples():
+    # U = 0 is one of the two most extreme of the C(6, 3) = 20 splits
+    assert mann_whitney([1, 2, 3], [4, 5, 6]) == (0, pytest.approx(0.1))
+    assert mann_whitney([4, 5, 6], [1, 2, 3]) == (9, pytest.approx(0.1))
+
+
+def test_exact_p_value_of_interleaved_samples():
+    # Ranks 1, 3, 5 give U = 3; 14 of the 20 splits are as far from 4.5
+    assert mann_whitney([1, 3, 5], [2, 4, 6]) == (3, pytest.approx(0.7))
+
+
+def test_tied_samples_use_the_corrected_normal_approximation():
+    assert list(average_ranks([1, 2, 2, 2, 3, 4])[0]) == [1, 3, 3, 3, 5, 6]
+    # U = 1, variance 3 * 3 / 12 * (7 - 24 / 30) = 4.65, z = (3.5 - 0.5) / 2.1564
+    u, p = mann_whitney([1, 2, 2], [2, 3, 4])
+    assert u == 1
+    assert p == pytest.approx(0.16414, abs=1e-4)
+
+
+def test_identical_samples_are_not_different():
+    assert mann_whitney([5, 5, 5], [5, 5, 5]) == (4.5, 1.0)
+
+
+def test_min_p_value_is_reached_by_separated_samples():
+    # Ties within each sample give a smaller p-value than the exact test's 0.1
+    assert min_p_value(3, 3) == pytest.approx(mann_whitney([1, 1, 1], [2, 2, 2])[1])
+    assert min_p_value(3, 3) < mann_whitney([1, 2, 3], [4, 5, 6])[1]
+    assert min_p_value(8, 8) == pytest.approx(mann_whitney([1] * 8, [2] * 8)[1])
+    assert min_p_value(8, 8) < 2 / math.comb(16, 8)
+
+
+def test_holm_keeps_input_order_and_is_monotone():
+    # Sorted 0.01, 0.03, 0.04 scale by 3, 2, 1 to 0.03, 0.06, 0.04 -> 0.06
+    assert list(holm([0.01, 0.04, 0.03])) == pytest.approx([0.03, 0.06, 0.06])
+    assert list(holm([0.6, 0.5])) == [1.0, 1.0]
+
+
+def test_compare_flags_only_significant_changes():
+    baseline = {("exact", "random", 4, 3, 2): list(np.linspace(1.0, 1.1, 8))}
+    slower = {key: [t * 1.5 for t in times] for key, times in baseline.items()}
+    (row,) = compare(baseline, slower)
+    assert row["verdict"] == "regression"
+    assert row["change"] == pytest.approx(0.5)
+    (row,) = compare(baseline, baseline)
+    assert row["verdict"] == "-"
+
+
+def record_run(db, name, times):
+    store = ResultsStore(db)
+    store.record([{**SIZE, "repetition": i, "elapsed": t} for i, t in enumerate(times)])
+    conn = connect(db)
+    try:
+        name_run(conn, name, store.meta["run_id"])
+    finally:
+        conn.close()
+
+
+def run_compare(db, *args):
+    return subprocess.run(
+        [sys.executable, os.path.join(HERE, "compare.py"), "--db", db, *args],
+        capture_output=True,
+        text=True,
+    ).returncode
+
+
+@pytest.mark.parametrize(
+    "current, runs, code",
+    [
+        (1.0, 8, 0),  # Unchanged
+        (1.5, 8, 1),  # Slower in every run
+        (1.5, 2, 3),  # Two runs per side can never reach alpha
+    ],
+)
+def test_exit_codes(tmp_path, current, runs, code):
+    db = str(tmp_path / "results.db")
+    base = np.linspace(1.0, 1.1, runs)
+    record_run(db, "base", base)
+    record_run(db, "now", base * current)
+    assert run_compare(db, "base", "now") == code
+
+
+def test_unknown_run_exits_2(tmp_path):
+    db = str(tmp_path / "results.db")
+    record_run(db, "base", [1.0, 1.1])
+    assert run_compare(db, "base", "missing") == 2
@@ -0,0 +1,216 @@
+"""Verifier for solver output files written under output/{mode}/{type}/."""
+
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from generate_graphs import COMPRESSIONS, read_test_input
+
+# ANSI color codes
+RED = "\033[91m"
+GREEN = "\033[92m"
+RESET = "\033[0m"
+
+INPUT_DIR = "input"
+OUTPUT_DIR = "output"
+
+SOLUTION_PATTERN = re.compile(r"found with (\d+) editions:")
+MAPPING_PATTERN = re.compile(rb"^G:([^\n]*)$", re.MULTILINE)
+CHUNK_SIZE = 1 << 24
+# Upper bound on cells compared at once when checking copies of H
+CHECK_BLOCK_CELLS = 1 << 24
+
+
+def read_matrix(f, n):
+    """Read n rows of a (possibly padded) adjacency matrix from a binary file."""
+    rows = b"".join(f.readline() for _ in range(n))
+    return np.fromstring(rows, dtype=np.int64, sep=" ").reshape(n, n)
+
+
+def read_output(filename):
+    """
+    Parse a solver report into (edits, extended G, k, selections).
+    Everything before the copies is read line by line; the copies section,
+    which dominates the file, is scanned in large chunks for the 'G:' mapping
+    lines only.
+    """
+    edits = extended = k = None
+    with open(filename, "rb") as f:
+        for line in f:
+            text = line.decode().strip()
+            if text.startswith("And given the number of copies to find k is"):
+                k = int(text.rsplit(" ", 1)[1])
+            match = SOLUTION_PATTERN.search(text)
+            if match:
+                edits = int(match.group(1))
+                n = int(f.readline())
+                extended = read_matrix(f, n)
+            if text.startswith("Copies of H found"):
+                break
+
+        mappings = []
+        tail = b""
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            data = tail + chunk
+            cut = data.rfind(b"\n") + 1
+            mappings.extend(MAPPING_PATTERN.findall(data, 0, cut))
+            tail = data[cut:]
+        mappings.extend(MAPPING_PATTERN.findall(tail))
+
+    if edits is None or k is None:
+        raise ValueError("not a solver report")
+
+    selections = np.fromstring(b" ".join(mappings), dtype=np.int64, sep=" ")
+    return edits, extended, k, selections
+
+
+def verify(input_file, output_file):
+    """Check a solver report against its input. Returns a list of problems."""
+    G, H, k = read_test_input(input_file)
+    try:
+        edits, R, reported_k, selections = read_output(output_file)
+    except (OSError, ValueError) as e:
+        return [f"cannot parse output: {e}"]
+
+    problems = []
+    n1, n2, N = len(G), len(H), len(R)
+
+    if reported_k != k:
+        problems.append(f"k is {reported_k}, expected {k}")
+    if N < n1:
+        return problems + [f"extended graph has {N} vertices, G has {n1}"]
+
+    base = R[:n1, :n1]
+    if (base < G).any():
+        problems.append(f"{int((base < G).sum())} edges of G were removed")
+
+    actual_edits = int(R.sum() - G.sum()) + (N - n1)
+    if actual_edits != edits:
+        problems.append(f"reported {edits} edits, actual difference is {actual_edits}")
+
+    if n2 == 0 or len(selections) != k * n2:
+        return problems + [
+            f"found {len(selections)} mapped vertices, expected {k} x {n2}"
+        ]
+    S = selections.reshape(k, n2)
+
+    if S.min() < 0 or S.max() >= N:
+        return problems + ["selections refer to vertices outside the extended graph"]
+
+    ordered = np.sort(S, axis=1)
+    if (ordered[:, 1:] == ordered[:, :-1]).any():
+        problems.append("a selection maps two vertices of H to the same vertex")
+    if len(np.unique(ordered, axis=0)) != k:
+        problems.append("selections are not pairwise distinct")
+
+    # Only cells with edges in H can be missing from a copy
+    hu, hv = np.nonzero(H)
+    required = H[hu, hv]
+    step = max(1, CHECK_BLOCK_CELLS // max(len(hu), 1))
+    missing = 0
+    for start in range(0, k, step):
+        block = S[start : start + step]
+        missing += int((R[block[:, hu], block[:, hv]] < required).any(axis=1).sum())
+    if missing:
+        problems.append(f"{missing} selections do not contain H")
+
+    return problems
+
+
+def _verify_pair(pair):
+    input_file, output_file = pair
+    return verify(input_file, output_file)
+
+
+def input_for(output_file):
+    """
+    Map output/{mode}/{type}/x_out.txt back to input/{mode}/{type}/x.txt, or
+    to its compressed x.txt.gz or x.txt.zst if that is what exists.
+    """
+    rel = os.path.relpath(output_file, OUTPUT_DIR)
+    base = os.path.join(INPUT_DIR, rel[: -len("_out.txt")] + ".txt")
+    for suffix in COMPRESSIONS.values():
+        if os.path.exists(base + suffix):
+            return base + suffix
+    return base
+
+
+def discover_outputs(modes, types=None):
+    outputs = []
+    for mode in modes:
+        mode_path = Path(OUTPUT_DIR) / mode
+        if not mode_path.exists():
+            continue
+        for type_dir in sorted(d for d in mode_path.iterdir() if d.is_dir()):
+            if types and type_dir.name not in types:
+                continue
+            outputs.extend(sorted(type_dir.glob("*_out.txt")))
+    return outputs
+
+
+def verify_all(outputs, jobs=1):
+    """Verify output files on a process pool. Returns the number of failures."""
+    pairs = [(input_for(output), output) for output in outputs]
+    if jobs <= 1:
+        reports = map(_verify_pair, pairs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        reports = executor.map(_verify_pair, pairs, chunksize=4)
+
+    failures = 0
+    for (_, output), problems in zip(pairs, reports):
+        if problems:
+            failures += 1
+            print(f"{RED}  FAIL: {output}{RESET}")
+            for problem in problems:
+                print(f"{RED}     {problem}{RESET}")
+        else:
+            print(f"  OK: {output}")
+
+    if jobs > 1:
+        executor.shutdown()
+
+    color = RED if failures else GREEN
+    print(f"\n{color}Verified {len(pairs)} outputs, {failures} failed{RESET}")
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify solver outputs")
+    parser.add_argument(
+        "outputs",
+        nargs="*",
+        help="Output files to verify (default: everything under output/)",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["exact", "approx", "both"],
+        default="both",
+        help="Algorithm mode",
+    )
+    parser.add_argument(
+        "--types",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Graph types to verify (default: all)",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Number of worker processes"
+    )
+    args = parser.parse_args()
+
+    modes = ["exact", "approx"] if args.mode == "both" else [args.mode]
+    outputs = args.outputs or discover_outputs(modes, args.types)
+
+    sys.exit(1 if verify_all(outputs, args.jobs) else 0)